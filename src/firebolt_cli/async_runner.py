@@ -0,0 +1,214 @@
+import asyncio
+import time
+from collections import deque
+from typing import (
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from firebolt.async_db import Connection, Cursor
+from firebolt.common.exception import FireboltError
+
+from firebolt_cli.script import is_set_statement
+from firebolt_cli.utils import FETCH_BATCH_SIZE, SPILL_THRESHOLD, SpillBuffer
+
+# the descriptions and the buffered rows of the result sets of a statement
+StatementResults = List[Tuple[Sequence, SpillBuffer]]
+
+# number of statements per statement in flight, which are read ahead
+# of the one being printed
+ASYNC_READ_AHEAD = 2
+
+
+class AsyncStatementRunner:
+    """
+    Execute statements on asyncio with the async client of the sdk. Up to
+    concurrency statements are in flight at once, multiplexed over a few
+    connections, without a thread per statement. The results are passed
+    to on_result in the order of the statements, in a background thread,
+    while the next statements are executed. A statement, which takes longer
+    than timeout, and the statements in flight after a failed one are cancelled.
+    Each statement in flight has its own cursor, the cursors are reused, as the
+    sdk keeps the values of SET statements in them. A SET statement runs once
+    the statements before it are finished, and is replayed on each cursor
+    before its next statement.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[Connection]],
+        connections: int,
+        concurrency: int,
+        timeout: Optional[float] = None,
+        spill_threshold: int = SPILL_THRESHOLD,
+    ):
+        self.connect = connect
+        self.connections = connections
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.spill_threshold = spill_threshold
+        # the SET statements run so far, and the number of them run on each cursor
+        self.settings: List[str] = []
+        self._applied: Dict[int, int] = {}
+
+    def run(
+        self,
+        statements: Iterable[Tuple[int, str]],
+        on_result: Callable[[int, StatementResults, float], None],
+    ) -> None:
+        """
+        execute the numbered statements, a blocking call
+        """
+        asyncio.run(self.run_async(statements, on_result))
+
+    async def run_async(
+        self,
+        statements: Iterable[Tuple[int, str]],
+        on_result: Callable[[int, StatementResults, float], None],
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        connections = await asyncio.gather(
+            *(self.connect() for _ in range(self.connections))
+        )
+        # a cursor per statement in flight, spread over the connections
+        all_cursors = [
+            connections[index % len(connections)].cursor()
+            for index in range(self.concurrency)
+        ]
+        cursors: "asyncio.Queue[Cursor]" = asyncio.Queue()
+        for cursor in all_cursors:
+            cursors.put_nowait(cursor)
+        self.settings, self._applied = [], {}
+        pending: Deque[Tuple[int, asyncio.Task]] = deque()
+        remaining = iter(statements)
+        setting: Optional[Tuple[int, str]] = None
+        setting_running = False
+
+        try:
+            while 1:
+                while (
+                    not setting_running
+                    and len(pending) < self.concurrency * ASYNC_READ_AHEAD
+                ):
+                    item = setting or next(remaining, None)
+                    if item is None:
+                        break
+
+                    number, statement = item
+                    setting = None
+                    if is_set_statement(statement):
+                        if pending:
+                            # wait for the earlier statements
+                            setting = item
+                            break
+                        setting_running = True
+                        self.settings.append(statement)
+
+                    task = asyncio.ensure_future(
+                        self._execute_limited(cursors, statement)
+                    )
+                    pending.append((number, task))
+
+                if not pending:
+                    break
+
+                number, task = pending[0]
+                try:
+                    results, duration = await task
+                except asyncio.TimeoutError:
+                    raise FireboltError(
+                        f"Statement {number} timed out after {self.timeout}s"
+                    )
+                except FireboltError as err:
+                    raise FireboltError(f"Statement {number} failed: {err}")
+                pending.popleft()
+                setting_running = False
+
+                try:
+                    await loop.run_in_executor(
+                        None, on_result, number, results, duration
+                    )
+                finally:
+                    for _, buffer in results:
+                        buffer.close()
+        finally:
+            for _, task in pending:
+                task.cancel()
+            for result in await asyncio.gather(
+                *(task for _, task in pending), return_exceptions=True
+            ):
+                if isinstance(result, tuple):
+                    for _, buffer in result[0]:
+                        buffer.close()
+
+            for cursor in all_cursors:
+                cursor.close()
+            await asyncio.gather(
+                *(connection.aclose() for connection in connections),
+                return_exceptions=True,
+            )
+
+    async def _execute_limited(
+        self, cursors: "asyncio.Queue[Cursor]", statement: str
+    ) -> Tuple[StatementResults, float]:
+        cursor = await cursors.get()
+        try:
+            start_time = time.monotonic()
+            if is_set_statement(statement):
+                results = await asyncio.wait_for(
+                    self._apply_settings(cursor), self.timeout
+                )
+            else:
+                results = await asyncio.wait_for(
+                    self._execute(cursor, statement), self.timeout
+                )
+            return results, time.monotonic() - start_time
+        finally:
+            cursors.put_nowait(cursor)
+
+    async def _apply_settings(self, cursor: Cursor) -> StatementResults:
+        """
+        run the SET statements, which were not run on the cursor yet
+        """
+        for setting in self.settings[self._applied.get(id(cursor), 0) :]:
+            await cursor.execute(setting)
+            self._applied[id(cursor)] = self._applied.get(id(cursor), 0) + 1
+
+        return []
+
+    async def _execute(self, cursor: Cursor, statement: str) -> StatementResults:
+        """
+        execute the statement with the cursor, after the SET statements
+        it has missed, and fetch all its result sets into SpillBuffers
+        """
+        results: StatementResults = []
+        await self._apply_settings(cursor)
+        try:
+            await cursor.execute(statement)
+            while 1:
+                if cursor.description:
+                    buffer = SpillBuffer(self.spill_threshold)
+                    results.append((cursor.description, buffer))
+                    while 1:
+                        batch = await cursor.fetchmany(FETCH_BATCH_SIZE)
+                        if not batch:
+                            break
+                        buffer.append(batch)
+
+                # nextset of the async cursor is annotated as returning None,
+                # but returns whether there is a next result set like the sync one
+                if not await cursor.nextset():  # type: ignore[func-returns-value]
+                    break
+        except BaseException:
+            for _, buffer in results:
+                buffer.close()
+            raise
+
+        return results
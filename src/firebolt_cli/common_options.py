@@ -1,10 +1,18 @@
 from os import environ
-from typing import Callable, List, Optional
-
-from click import Context, MissingParameter, Parameter, option, prompt
+from typing import Callable, List, Optional, Sequence
+
+from click import (
+    BadParameter,
+    Choice,
+    Context,
+    MissingParameter,
+    Parameter,
+    option,
+    prompt,
+)
 from firebolt.client import DEFAULT_API_URL
 
-from firebolt_cli.utils import read_config
+from firebolt_cli.utils import parse_bytes, read_config
 
 
 def default_from_config_file(
@@ -45,6 +53,21 @@ def password_from_config_file(
     return pw_value
 
 
+def bytes_from_string(
+    ctx: Context, param: Parameter, value: Optional[str]
+) -> Optional[int]:
+    """
+    Convert a size option like 256MB to the number of bytes
+    """
+    if value is None:
+        return None
+
+    try:
+        return parse_bytes(value)
+    except ValueError as err:
+        raise BadParameter(str(err), ctx=ctx, param=param)
+
+
 _common_options: List[Callable] = [
     option(
         "-u",
@@ -89,6 +112,13 @@ def common_options(command: Callable) -> Callable:
 
 
 def json_option(command: Callable) -> Callable:
+    command = option(
+        "--compact",
+        help="Provide json output without indentation",
+        default=False,
+        is_flag=True,
+        multiple=False,
+    )(command)
     return option(
         "--json",
         help="Provide output in json format",
@@ -96,3 +126,15 @@ def json_option(command: Callable) -> Callable:
         is_flag=True,
         multiple=False,
     )(command)
+
+
+def format_option(formats: Sequence[str], default: Optional[str] = None) -> Callable:
+    def inner(command: Callable) -> Callable:
+        return option(
+            "--format",
+            help="Output format",
+            type=Choice(list(formats), case_sensitive=False),
+            default=default,
+        )(command)
+
+    return inner
@@ -0,0 +1,195 @@
+import re
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from firebolt.common.exception import FireboltError
+
+from firebolt_cli.script import is_set_statement
+
+# annotations in the comments of a statement, e.g.
+# -- @name load_orders
+# -- @depends create_orders, create_customers
+NAME_ANNOTATION = re.compile(r"@name\s+(\w+)")
+DEPENDS_ANNOTATION = re.compile(r"@depends\s+(\w+(?:\s*,\s*\w+)*)")
+
+# strings and comments are removed before looking for the table names,
+# quoted identifiers are kept, quotes could be escaped with a backslash
+LITERALS = re.compile(
+    r"'(?:[^'\\]|''|\\.)*'|\"(?:[^\"\\]|\"\"|\\.)*\"|--[^\n]*|/\*.*?\*/", re.S
+)
+COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+
+IDENTIFIER = r"((?:\"(?:[^\"]|\"\")+\"|[\w$]+)(?:\.(?:\"(?:[^\"]|\"\")+\"|[\w$]+))*)"
+# statements, which create, change or drop the table
+WRITE_PATTERNS = [
+    re.compile(
+        r"\b(?:create|drop|alter|truncate)\s+"
+        r"(?:(?:or\s+replace|fact|dimension|external|temporary)\s+)*"
+        r"(?:table|view)\s+(?:if\s+(?:not\s+)?exists\s+)?" + IDENTIFIER,
+        re.I,
+    ),
+    re.compile(r"\binsert\s+(?:into\s+)?" + IDENTIFIER, re.I),
+    re.compile(r"\b(?:update|delete\s+from)\s+" + IDENTIFIER, re.I),
+    re.compile(
+        r"\bcreate\s+(?:and\s+generate\s+)?(?:aggregating\s+|join\s+)?index\s+"
+        r"[\w$\"]+\s+on\s+" + IDENTIFIER,
+        re.I,
+    ),
+]
+# statements, which read the table
+READ_PATTERNS = [re.compile(r"\b(?:from|join)\s+" + IDENTIFIER, re.I)]
+# the next table of a comma separated list after FROM, after the alias
+# of the previous one, and a comma, which is not followed by a table name
+ALIAS = r"(?:\s+(?:as\s+)?(?:\"(?:[^\"]|\"\")+\"|[\w$]+))?"
+NEXT_TABLE = re.compile(ALIAS + r"\s*,\s*" + IDENTIFIER, re.I)
+NEXT_ITEM = re.compile(ALIAS + r"\s*,\s*(\(\s*select\b)?", re.I)
+
+
+def normalize_identifier(identifier: str) -> str:
+    """
+    unquoted identifiers are case insensitive, quoted ones are kept as they are
+    """
+    return ".".join(
+        part[1:-1].replace('""', '"') if part.startswith('"') else part.lower()
+        for part in re.findall(r"\"(?:[^\"]|\"\")+\"|[^.]+", identifier)
+    )
+
+
+class ScriptStatement:
+    """
+    A statement of a script with the tables it reads and writes,
+    and the dependencies declared in its comments
+    """
+
+    def __init__(self, number: int, text: str):
+        self.number = number
+        self.text = text
+
+        comments = " ".join(COMMENTS.findall(text))
+        name = NAME_ANNOTATION.search(comments)
+        self.name: Optional[str] = name.group(1) if name else None
+        depends = DEPENDS_ANNOTATION.findall(comments)
+        self.depends: Optional[List[str]] = (
+            [dep.strip() for deps in depends for dep in deps.split(",")]
+            if depends
+            else None
+        )
+
+        code = LITERALS.sub(
+            lambda match: match.group() if match.group().startswith('"') else " ",
+            text,
+        )
+        self.writes = {
+            normalize_identifier(table)
+            for pattern in WRITE_PATTERNS
+            for table in pattern.findall(code)
+        }
+        tables = []
+        # a FROM list with something else than tables and subqueries
+        self.unknown_reads = False
+        for pattern in READ_PATTERNS:
+            for match in pattern.finditer(code):
+                tables.append(match.group(1))
+                end = match.end()
+                while match.group().lower().startswith("from"):
+                    next_table = NEXT_TABLE.match(code, end)
+                    if next_table is None:
+                        item = NEXT_ITEM.match(code, end)
+                        self.unknown_reads |= item is not None and not item.group(1)
+                        break
+                    tables.append(next_table.group(1))
+                    end = next_table.end()
+        self.reads = {normalize_identifier(table) for table in tables} - self.writes
+        self.is_setting = is_set_statement(text)
+
+    @property
+    def is_barrier(self) -> bool:
+        """
+        a statement without any known tables could depend on anything,
+        a SET statement applies to all the later ones
+        """
+        return (
+            self.is_setting
+            or self.unknown_reads
+            or (not self.reads and not self.writes)
+        )
+
+    def depends_on(self, other: "ScriptStatement") -> bool:
+        """
+        whether the statement has to run after the earlier statement other,
+        because one of them writes a table the other one uses
+        """
+        if self.is_barrier or other.is_barrier:
+            return True
+
+        return bool(
+            other.writes & (self.reads | self.writes) or other.reads & self.writes
+        )
+
+
+def statement_dependencies(statements: Sequence[ScriptStatement]) -> List[Set[int]]:
+    """
+    Return the indexes of the earlier statements each statement depends on.
+    The dependencies declared with @depends are used as they are,
+    otherwise they are inferred from the tables the statements use.
+    A SET statement depends on all the earlier statements,
+    and all the later statements depend on it
+    """
+    names: Dict[str, int] = {}
+    dependencies: List[Set[int]] = []
+    last_setting: Optional[int] = None
+
+    for idx, statement in enumerate(statements):
+        if statement.is_setting:
+            dependencies.append(set(range(idx)))
+            last_setting = idx
+        elif statement.depends is not None:
+            unknown = [name for name in statement.depends if name not in names]
+            if unknown:
+                raise FireboltError(
+                    f"Statement {statement.number} depends on {', '.join(unknown)}, "
+                    "which is not a name of an earlier statement"
+                )
+            dependencies.append({names[name] for name in statement.depends})
+            if last_setting is not None:
+                dependencies[-1].add(last_setting)
+        else:
+            dependencies.append(
+                {
+                    other_idx
+                    for other_idx in range(idx)
+                    if statement.depends_on(statements[other_idx])
+                }
+            )
+
+        if statement.name is not None:
+            names[statement.name] = idx
+
+    return dependencies
+
+
+def critical_path(
+    dependencies: Sequence[Set[int]], durations: Sequence[float]
+) -> Tuple[List[int], float]:
+    """
+    Return the indexes of the statements on the longest chain of dependencies
+    by the sum of their durations, and the sum itself
+    """
+    if not durations:
+        return [], 0.0
+
+    # dependencies always point to earlier statements, so the order is topological
+    finish: List[float] = []
+    previous: List[Optional[int]] = []
+    for idx, deps in enumerate(dependencies):
+        last = max(deps, key=lambda dep: finish[dep], default=None)
+        previous.append(last)
+        finish.append(durations[idx] + (finish[last] if last is not None else 0.0))
+
+    end = max(range(len(finish)), key=finish.__getitem__)
+    path = []
+    node: Optional[int] = end
+    while node is not None:
+        path.append(node)
+        node = previous[node]
+
+    return path[::-1], finish[end]
@@ -2,7 +2,18 @@ from click import argument, command, confirm, echo, group, option
 from firebolt.model.database import Database
 from firebolt.service.manager import ResourceManager
 
-from firebolt_cli.common_options import common_options, json_option
+from firebolt_cli.common_options import (
+    common_options,
+    format_option,
+    json_option,
+)
+from firebolt_cli.output import (
+    JSON_FORMAT,
+    NDJSON_FORMAT,
+    TABULAR_FORMAT,
+    render_json,
+    render_ndjson,
+)
 from firebolt_cli.utils import (
     construct_resource_manager,
     construct_shortcuts,
@@ -14,7 +25,7 @@ from firebolt_cli.utils import (
 
 
 def print_db_full_information(
-    rm: ResourceManager, database: Database, use_json: bool
+    rm: ResourceManager, database: Database, use_json: bool, compact: bool = False
 ) -> None:
     attached_engines = rm.bindings.get_engines_bound_to_database(database)
     attached_engine_names = [str(engine.name) for engine in attached_engines]
@@ -42,6 +53,7 @@ def print_db_full_information(
                 "attached_engine_names",
             ],
             use_json=use_json,
+            compact=compact,
         )
     )
 
@@ -89,7 +101,12 @@ def create(**raw_config_options: str) -> None:
     if not raw_config_options["json"]:
         echo(f"Database {database.name} is successfully created")
 
-    print_db_full_information(rm, database, bool(raw_config_options["json"]))
+    print_db_full_information(
+        rm,
+        database,
+        bool(raw_config_options["json"]),
+        bool(raw_config_options["compact"]),
+    )
 
 
 @command(name="list (ls)")
@@ -101,6 +118,7 @@ def create(**raw_config_options: str) -> None:
     type=str,
 )
 @json_option
+@format_option([TABULAR_FORMAT, JSON_FORMAT, NDJSON_FORMAT])
 @exit_on_firebolt_exception
 def list(**raw_config_options: str) -> None:
     """
@@ -113,24 +131,34 @@ def list(**raw_config_options: str) -> None:
         order_by="DATABASE_ORDER_NAME_ASC",
     )
 
-    if not raw_config_options["json"]:
+    output_format = raw_config_options["format"] or (
+        JSON_FORMAT if raw_config_options["json"] else TABULAR_FORMAT
+    )
+
+    if output_format == TABULAR_FORMAT:
         echo(f"Found {len(databases)} databases")
 
-    if raw_config_options["json"] or databases:
-        echo(
-            prepare_execution_result_table(
-                data=[
-                    [
-                        db.name,
-                        str(rm.regions.get_by_key(db.compute_region_key).name),
-                        db.description,
-                    ]
-                    for db in databases
-                ],
-                header=["name", "region", "description"],
-                use_json=bool(raw_config_options["json"]),
-            )
-        )
+    data = (
+        [
+            db.name,
+            str(rm.regions.get_by_key(db.compute_region_key).name),
+            db.description,
+        ]
+        for db in databases
+    )
+    header = ["name", "region", "description"]
+
+    if output_format == NDJSON_FORMAT:
+        for line in render_ndjson(header, ([row] for row in data)):
+            echo(line)
+    elif output_format == JSON_FORMAT:
+        for chunk in render_json(
+            header, ([row] for row in data), bool(raw_config_options["compact"])
+        ):
+            echo(chunk, nl=False)
+        echo()
+    elif databases:
+        echo(prepare_execution_result_table(data=[row for row in data], header=header))
 
 
 @command()
@@ -175,7 +203,12 @@ def describe(**raw_config_options: str) -> None:
     """
     rm = construct_resource_manager(**raw_config_options)
     database = rm.databases.get_by_name(name=raw_config_options["database_name"])
-    print_db_full_information(rm, database, bool(raw_config_options["json"]))
+    print_db_full_information(
+        rm,
+        database,
+        bool(raw_config_options["json"]),
+        bool(raw_config_options["compact"]),
+    )
 
 
 @command()
@@ -206,7 +239,12 @@ def update(**raw_config_options: str) -> None:
     if not raw_config_options["json"]:
         echo(f"The database {database.name} was successfully updated")
 
-    print_db_full_information(rm, database, bool(raw_config_options["json"]))
+    print_db_full_information(
+        rm,
+        database,
+        bool(raw_config_options["json"]),
+        bool(raw_config_options["compact"]),
+    )
 
 
 database.add_command(create)
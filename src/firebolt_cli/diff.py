@@ -0,0 +1,167 @@
+import json
+import os
+import tempfile
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+from typing import IO, Dict, Iterable, Iterator, List, Sequence
+
+# number of temporary files each side of an unordered diff is split into,
+# only a single pair of them is kept in memory at a time
+DIFF_PARTITIONS = 64
+# number of the different rows of each side kept to be printed
+DIFF_LIMIT = 100
+
+row_encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+
+
+class ResultDiff:
+    """
+    Row counts of both sides, and the rows found only on one of the sides,
+    the rows are kept up to the limit, but all of them are counted
+    """
+
+    def __init__(self, limit: int = DIFF_LIMIT):
+        self.limit = limit
+        self.left_rows = 0
+        self.right_rows = 0
+
+        self.only_left: List[List] = []
+        self.only_right: List[List] = []
+        self.only_left_count = 0
+        self.only_right_count = 0
+
+    @property
+    def equal(self) -> bool:
+        return self.only_left_count == 0 and self.only_right_count == 0
+
+    def add_only_left(self, encoded_row: str, count: int = 1) -> None:
+        self.only_left_count += count
+        self._keep(self.only_left, encoded_row, count)
+
+    def add_only_right(self, encoded_row: str, count: int = 1) -> None:
+        self.only_right_count += count
+        self._keep(self.only_right, encoded_row, count)
+
+    def _keep(self, rows: List[List], encoded_row: str, count: int) -> None:
+        for _ in range(min(count, self.limit - len(rows))):
+            rows.append(json.loads(encoded_row))
+
+
+def encode_rows(batches: Iterable[Sequence[Sequence]]) -> Iterator[str]:
+    """
+    Encode the rows as compact json, so equal values are compared equal
+    on both sides, no matter how they are fetched
+    """
+    for batch in batches:
+        for row in batch:
+            yield row_encoder.encode(row)
+
+
+def diff_ordered(
+    left_batches: Iterable[Sequence[Sequence]],
+    right_batches: Iterable[Sequence[Sequence]],
+    limit: int = DIFF_LIMIT,
+) -> ResultDiff:
+    """
+    Compare the results row by row, the rows at the same position are expected
+    to be equal
+    """
+    diff = ResultDiff(limit)
+
+    for left, right in zip_longest(
+        encode_rows(left_batches), encode_rows(right_batches)
+    ):
+        if left is not None:
+            diff.left_rows += 1
+        if right is not None:
+            diff.right_rows += 1
+
+        if left != right:
+            if left is not None:
+                diff.add_only_left(left)
+            if right is not None:
+                diff.add_only_right(right)
+
+    return diff
+
+
+def partition_rows(
+    batches: Iterable[Sequence[Sequence]], prefix: str, partitions: int
+) -> int:
+    """
+    Write the encoded rows to the partition files by the hash of the row,
+    so equal rows of both sides end up in the partitions with the same number.
+    Return the number of rows.
+    """
+    files: Dict[int, IO[str]] = {}
+    row_count = 0
+
+    try:
+        for batch in batches:
+            lines: Dict[int, List[str]] = defaultdict(list)
+            for row in encode_rows([batch]):
+                lines[hash(row) % partitions].append(row)
+
+            for partition, rows in lines.items():
+                if partition not in files:
+                    files[partition] = open(
+                        f"{prefix}-{partition}", "w", encoding="utf-8"
+                    )
+                files[partition].write("\n".join(rows) + "\n")
+
+            row_count += len(batch)
+    finally:
+        for file in files.values():
+            file.close()
+
+    return row_count
+
+
+def read_partition(prefix: str, partition: int) -> Iterator[str]:
+    path = f"{prefix}-{partition}"
+    if not os.path.exists(path):
+        return
+
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            yield line.rstrip("\n")
+
+
+def diff_unordered(
+    left_batches: Iterable[Sequence[Sequence]],
+    right_batches: Iterable[Sequence[Sequence]],
+    limit: int = DIFF_LIMIT,
+    partitions: int = DIFF_PARTITIONS,
+) -> ResultDiff:
+    """
+    Compare the results as multisets of rows. Both sides are hash partitioned
+    into temporary files at the same time, then each pair of partitions
+    is compared in memory.
+    """
+    diff = ResultDiff(limit)
+
+    with tempfile.TemporaryDirectory(prefix="firebolt-cli-") as directory:
+        left_prefix = os.path.join(directory, "left")
+        right_prefix = os.path.join(directory, "right")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            left_rows = pool.submit(
+                partition_rows, left_batches, left_prefix, partitions
+            )
+            right_rows = pool.submit(
+                partition_rows, right_batches, right_prefix, partitions
+            )
+            diff.left_rows, diff.right_rows = left_rows.result(), right_rows.result()
+
+        for partition in range(partitions):
+            counts = Counter(read_partition(left_prefix, partition))
+            counts.subtract(read_partition(right_prefix, partition))
+
+            for row, count in counts.items():
+                if count > 0:
+                    diff.add_only_left(row, count)
+                elif count < 0:
+                    diff.add_only_right(row, -count)
+
+    return diff
@@ -22,7 +22,18 @@ from firebolt.service.types import (
     WarmupMethod,
 )
 
-from firebolt_cli.common_options import common_options, json_option
+from firebolt_cli.common_options import (
+    common_options,
+    format_option,
+    json_option,
+)
+from firebolt_cli.output import (
+    JSON_FORMAT,
+    NDJSON_FORMAT,
+    TABULAR_FORMAT,
+    render_json,
+    render_ndjson,
+)
 from firebolt_cli.utils import (
     construct_resource_manager,
     construct_shortcuts,
@@ -289,13 +300,14 @@ def engine_properties_options(create_mode: bool = True) -> Callable:
 
 
 def echo_engine_information(
-    rm: ResourceManager, engine: Engine, use_json: bool
+    rm: ResourceManager, engine: Engine, use_json: bool, compact: bool = False
 ) -> None:
     """
 
     :param engine:
     :param database:
     :param use_json:
+    :param compact:
     :return:
     """
 
@@ -353,6 +365,7 @@ def echo_engine_information(
                 "scale",
             ],
             use_json=bool(use_json),
+            compact=compact,
         )
     )
 
@@ -451,7 +464,12 @@ def create(**raw_config_options: str) -> None:
             f"and attached to the {database.name}"
         )
 
-    echo_engine_information(rm, engine, bool(raw_config_options["json"]))
+    echo_engine_information(
+        rm,
+        engine,
+        bool(raw_config_options["json"]),
+        bool(raw_config_options["compact"]),
+    )
 
 
 @command()
@@ -502,7 +520,12 @@ def update(**raw_config_options: str) -> None:
     if not raw_config_options["json"]:
         echo(f"Engine {engine.name} is successfully updated")
 
-    echo_engine_information(rm, engine, bool(raw_config_options["json"]))
+    echo_engine_information(
+        rm,
+        engine,
+        bool(raw_config_options["json"]),
+        bool(raw_config_options["compact"]),
+    )
 
 
 @command()
@@ -534,6 +557,7 @@ def status(**raw_config_options: str) -> None:
     type=str,
 )
 @json_option
+@format_option([TABULAR_FORMAT, JSON_FORMAT, NDJSON_FORMAT])
 @exit_on_firebolt_exception
 def list(**raw_config_options: str) -> None:
     """
@@ -547,26 +571,36 @@ def list(**raw_config_options: str) -> None:
         order_by="ENGINE_ORDER_NAME_ASC",
     )
 
-    if not raw_config_options["json"]:
+    output_format = raw_config_options["format"] or (
+        JSON_FORMAT if raw_config_options["json"] else TABULAR_FORMAT
+    )
+
+    if output_format == TABULAR_FORMAT:
         echo("Found {num_engines} engines".format(num_engines=len(engines)))
 
-    if raw_config_options["json"] or engines:
-        echo(
-            prepare_execution_result_table(
-                data=[
-                    [
-                        engine.name,
-                        engine.current_status_summary.name
-                        if engine.current_status_summary
-                        else EngineStatusSummary.ENGINE_STATUS_SUMMARY_UNSPECIFIED,
-                        rm.regions.get_by_key(engine.compute_region_key).name,
-                    ]
-                    for engine in engines
-                ],
-                header=["name", "status", "region"],
-                use_json=bool(raw_config_options["json"]),
-            )
-        )
+    data = (
+        [
+            engine.name,
+            engine.current_status_summary.name
+            if engine.current_status_summary
+            else EngineStatusSummary.ENGINE_STATUS_SUMMARY_UNSPECIFIED,
+            rm.regions.get_by_key(engine.compute_region_key).name,
+        ]
+        for engine in engines
+    )
+    header = ["name", "status", "region"]
+
+    if output_format == NDJSON_FORMAT:
+        for line in render_ndjson(header, ([row] for row in data)):
+            echo(line)
+    elif output_format == JSON_FORMAT:
+        for chunk in render_json(
+            header, ([row] for row in data), bool(raw_config_options["compact"])
+        ):
+            echo(chunk, nl=False)
+        echo()
+    elif engines:
+        echo(prepare_execution_result_table(data=[row for row in data], header=header))
 
 
 @command()
@@ -611,7 +645,12 @@ def describe(**raw_config_options: str) -> None:
     """
     rm = construct_resource_manager(**raw_config_options)
     engine = rm.engines.get_by_name(name=raw_config_options["engine_name"])
-    echo_engine_information(rm, engine, bool(raw_config_options["json"]))
+    echo_engine_information(
+        rm,
+        engine,
+        bool(raw_config_options["json"]),
+        bool(raw_config_options["compact"]),
+    )
 
 
 engine.add_command(create)
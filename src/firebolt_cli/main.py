@@ -4,7 +4,7 @@ from firebolt_cli import __version__
 from firebolt_cli.configure import configure
 from firebolt_cli.database import database
 from firebolt_cli.engine import engine
-from firebolt_cli.query import query
+from firebolt_cli.query import query_group
 from firebolt_cli.table import table
 from firebolt_cli.utils import construct_shortcuts
 
@@ -30,6 +30,6 @@ def main() -> None:
 
 main.add_command(configure)
 main.add_command(engine)
-main.add_command(query)
+main.add_command(query_group)
 main.add_command(database)
 main.add_command(table)
@@ -0,0 +1,728 @@
+import csv
+import gzip
+import io
+import json
+import os
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from typing import (
+    IO,
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    cast,
+)
+
+from firebolt.common.exception import FireboltError
+from firebolt.db import ARRAY, DATETIME64, DECIMAL
+
+TABULAR_FORMAT = "tabular"
+EXPANDED_FORMAT = "expanded"
+CSV_FORMAT = "csv"
+JSON_FORMAT = "json"
+NDJSON_FORMAT = "ndjson"
+PARQUET_FORMAT = "parquet"
+ARROW_FORMAT = "arrow"
+
+ROW_GROUP_SIZE = 100000
+
+GZIP_COMPRESSION = "gzip"
+ZSTD_COMPRESSION = "zstd"
+COMPRESSION_EXTENSIONS = {GZIP_COMPRESSION: ".gz", ZSTD_COMPRESSION: ".zst"}
+MANIFEST_FILE = "manifest.json"
+
+# indentation of the json output, the same as the json output always had
+JSON_INDENT = 4
+# the json module escapes the characters beyond printable ascii,
+# orjson writes them as they are
+ORJSON_UNESCAPED = re.compile(r"[^\x00-\x7e]")
+
+GRID_SAMPLE_SIZE = 100
+GRID_MAX_CELL_WIDTH = 50
+TRUNCATION_MARK = "..."
+# tabulate keeps headers at least two spaces wider than their names
+HEADER_PADDING = 2
+
+# csv.writer quotes a field, if it contains any of these characters
+CSV_SPECIAL_CHARACTERS = [",", '"', "\r", "\n"]
+CSV_LINE_TERMINATOR = "\r\n"
+
+
+def format_cell(value: Any, max_width: Optional[int] = None) -> str:
+    """
+    Convert a value to its single-line text representation for the grid,
+    only the part of a long text, which could be shown within max_width,
+    is converted
+    """
+    if value is None:
+        return ""
+
+    if max_width is not None and isinstance(value, str) and len(value) > max_width:
+        # one more character is kept, so the text is still marked as truncated
+        value = value[: max_width + 1]
+
+    return str(value).replace("\r", "\\r").replace("\n", "\\n")
+
+
+def truncate_cell(text: str, width: int) -> str:
+    if len(text) > width:
+        return text[: width - len(TRUNCATION_MARK)] + TRUNCATION_MARK
+
+    return text
+
+
+def is_numeric(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+class GridRenderer:
+    """
+    Render rows in the layout of the tabulate "grid" format. Column widths and
+    alignments are fixed up front from a sample of rows, so all the following rows
+    can be rendered one by one, cells wider than the column are truncated.
+    With max_width only the leading columns, which fit into it, are rendered.
+    Unlike tabulate, the cells are str of the values on a single line, and only
+    the columns of numbers are right aligned, without aligning decimal points.
+    """
+
+    def __init__(
+        self,
+        headers: Sequence[str],
+        sample: Sequence[Sequence],
+        max_cell_width: Optional[int] = GRID_MAX_CELL_WIDTH,
+        max_width: Optional[int] = None,
+    ):
+        self.widths: List[int] = []
+        self.right_aligned: List[bool] = []
+
+        for idx, header in enumerate(headers):
+            values = [row[idx] for row in sample if row[idx] is not None]
+            width = max(
+                [len(format_cell(v, max_cell_width)) for v in values]
+                + [len(str(header)) + HEADER_PADDING]
+            )
+            if max_cell_width is not None:
+                width = min(width, max(max_cell_width, len(TRUNCATION_MARK)))
+
+            self.widths.append(width)
+            self.right_aligned.append(
+                len(values) != 0 and all(is_numeric(v) for v in values)
+            )
+
+        if max_width is not None:
+            self._fit_columns(max_width)
+        self.hidden_columns = len(headers) - len(self.widths)
+
+        self.header = self._line([str(h) for h in headers[: len(self.widths)]])
+
+    def _fit_columns(self, max_width: int) -> None:
+        # each column takes its width, two spaces of padding and a separator
+        line_width = 1
+        for idx, width in enumerate(self.widths):
+            if line_width + width + 3 > max_width:
+                if idx == 0:
+                    # the first column is always shown, shrunk to max_width
+                    self.widths[0] = max(len(TRUNCATION_MARK), max_width - 4)
+                    idx = 1
+                del self.widths[idx:]
+                del self.right_aligned[idx:]
+                return
+
+            line_width += width + 3
+
+    def _fit(self, text: str, idx: int) -> str:
+        width = self.widths[idx]
+        text = truncate_cell(text, width)
+
+        return text.rjust(width) if self.right_aligned[idx] else text.ljust(width)
+
+    def _line(self, cells: Sequence[str]) -> str:
+        return (
+            "| "
+            + " | ".join(self._fit(cell, idx) for idx, cell in enumerate(cells))
+            + " |"
+        )
+
+    def _border(self, fill: str) -> str:
+        return "+" + "+".join(fill * (width + 2) for width in self.widths) + "+"
+
+    def render_header(self) -> str:
+        return "\n".join([self._border("-"), self.header, self._border("=")])
+
+    def render_rows(self, rows: Iterable[Sequence]) -> str:
+        border = self._border("-")
+        return "\n".join(
+            "{}\n{}".format(
+                self._line(
+                    [
+                        format_cell(v, width)
+                        for v, width in zip(row[: len(self.widths)], self.widths)
+                    ]
+                ),
+                border,
+            )
+            for row in rows
+        )
+
+    def render_empty(self) -> str:
+        return self._border("-")
+
+
+def render_grid(
+    headers: Sequence[str],
+    batches: Iterable[Sequence[Sequence]],
+    sample_size: int = GRID_SAMPLE_SIZE,
+    max_cell_width: Optional[int] = GRID_MAX_CELL_WIDTH,
+    max_width: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Render batches of rows as a grid table, and yield it chunk by chunk.
+    Only the first sample_size rows are read before the header is yielded,
+    the rest of the rows are rendered as the batches arrive.
+    The columns, which don't fit into max_width, are left out.
+    """
+    batches = iter(batches)
+
+    leading_rows: List[Sequence] = []
+    for batch in batches:
+        leading_rows.extend(batch)
+        if len(leading_rows) >= sample_size:
+            break
+
+    renderer = GridRenderer(
+        headers, leading_rows[:sample_size], max_cell_width, max_width
+    )
+    yield renderer.render_header()
+
+    if not leading_rows:
+        yield renderer.render_empty()
+    else:
+        yield renderer.render_rows(leading_rows)
+        for batch in batches:
+            if batch:
+                yield renderer.render_rows(batch)
+
+    if renderer.hidden_columns:
+        yield (
+            f"{renderer.hidden_columns} more columns don't fit into the width "
+            f"of the terminal, use the {EXPANDED_FORMAT} format to see them"
+        )
+
+
+def render_expanded(
+    headers: Sequence[str],
+    batches: Iterable[Sequence[Sequence]],
+    max_cell_width: Optional[int] = None,
+    max_width: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Render each row as a record with a line for each column, so wide rows
+    are readable, and yield the records of each batch as soon as it arrives.
+    The values are truncated to max_cell_width and to the rest of max_width
+    """
+    label_width = max([len(str(header)) for header in headers] + [0])
+
+    width = max_cell_width
+    if max_width is not None:
+        width = min(width or max_width, max_width - label_width - 3)
+    if width is not None:
+        width = max(width, len(TRUNCATION_MARK))
+
+    record = 0
+    for batch in batches:
+        lines: List[str] = []
+        for row in batch:
+            record += 1
+            lines.append(f"-[ RECORD {record} ]-")
+            for header, value in zip(headers, row):
+                text = format_cell(value, width)
+                if width is not None:
+                    text = truncate_cell(text, width)
+                lines.append(f"{str(header).ljust(label_width)} | {text}")
+
+        if lines:
+            yield "\n".join(lines)
+
+    if record == 0:
+        yield "(0 rows)"
+
+
+def escape_json_character(match: re.Match) -> str:
+    """
+    escape a character the same way json.dumps does with ensure_ascii
+    """
+    code = ord(match.group())
+    if code < 0x10000:
+        return "\\u{:04x}".format(code)
+
+    code -= 0x10000
+    return "\\u{:04x}\\u{:04x}".format(0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+
+
+def contains_float(value: Any) -> bool:
+    """
+    whether there is a float in the value or in the lists and dicts it contains,
+    the values nested at the same level are checked at once by their types
+    """
+    if isinstance(value, dict):
+        value = list(value.values())
+    elif not isinstance(value, (list, tuple)):
+        return isinstance(value, float)
+
+    types = set(map(type, value))
+    if any(issubclass(kind, float) for kind in types):
+        return True
+    if not any(issubclass(kind, (list, tuple, dict)) for kind in types):
+        return False
+
+    nested: List[Any] = []
+    for item in value:
+        if isinstance(item, dict):
+            nested.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            nested.extend(item)
+
+    return contains_float(nested)
+
+
+class JsonEncoder:
+    """
+    Encode values to json text, either compact or indented the same way
+    as json.dumps with indent=4 does. If orjson is installed, it is used
+    for the compact values it supports, the rest are encoded by the json
+    module, so the output is the same either way. Floats are always encoded
+    by the json module, as orjson writes them differently, e.g. 1e-7
+    and null for nan. Indented values are encoded by the json module only,
+    reindenting the output of orjson costs more than it saves.
+    """
+
+    def __init__(
+        self, compact: bool = False, default: Optional[Callable[[Any], Any]] = None
+    ):
+        self.compact = compact
+        self.default = default
+        self.orjson = import_orjson() if compact else None
+
+        if compact:
+            self._encoder = json.JSONEncoder(separators=(",", ":"), default=default)
+        else:
+            self._encoder = json.JSONEncoder(indent=JSON_INDENT, default=default)
+
+        if self.orjson is not None:
+            # dates and dataclasses are passed to default, as the json module does
+            self._orjson_options = (
+                self.orjson.OPT_PASSTHROUGH_DATETIME
+                | self.orjson.OPT_PASSTHROUGH_DATACLASS
+            )
+
+    def encode(self, value: Any) -> str:
+        text = None
+        if self.orjson is not None and not contains_float(value):
+            try:
+                text = self.orjson.dumps(
+                    value, default=self.default, option=self._orjson_options
+                ).decode("utf-8")
+            except TypeError:
+                # e.g. integers beyond 64 bits, the json module could encode them
+                pass
+            else:
+                if not text.isascii() or "\x7f" in text:
+                    text = ORJSON_UNESCAPED.sub(escape_json_character, text)
+
+        if text is None:
+            text = self._encoder.encode(value)
+
+        return text
+
+
+def render_json(
+    headers: Sequence[str],
+    batches: Iterable[Sequence[Sequence]],
+    compact: bool = False,
+    default: Optional[Callable[[Any], Any]] = None,
+) -> Iterator[str]:
+    """
+    Render the rows as a json array of objects, the same way as json.dumps does,
+    and yield the objects of each batch as soon as the batch arrives
+    """
+    encoder = JsonEncoder(compact, default)
+    if compact:
+        start, separator, end = "[", ",", "]"
+    else:
+        indent = " " * JSON_INDENT
+        start, separator, end = f"[\n{indent}", f",\n{indent}", "\n]"
+
+    empty = True
+    for batch in batches:
+        if not batch:
+            continue
+
+        # the batch is encoded as an array at once, which is faster
+        # than row by row, and spliced into the whole array
+        text = encoder.encode([dict(zip(headers, row)) for row in batch])
+        yield (start if empty else separator) + text[len(start) : -len(end)]
+        empty = False
+
+    yield "[]" if empty else end
+
+
+def render_ndjson(
+    headers: Sequence[str], batches: Iterable[Sequence[Sequence]]
+) -> Iterator[str]:
+    """
+    Render each row as a compact json object on a separate line,
+    and yield the lines of each batch as soon as the batch arrives
+    """
+    encoder = JsonEncoder(compact=True, default=str)
+
+    for batch in batches:
+        if batch:
+            yield "\n".join(encoder.encode(dict(zip(headers, row))) for row in batch)
+
+
+def format_csv_plain(column: Sequence) -> List[str]:
+    """
+    Convert a column of values, which never need quoting, to csv fields
+    """
+    if None in column:
+        return ["" if v is None else str(v) for v in column]
+
+    return list(map(str, column))
+
+
+def quote_csv_field(field: str) -> str:
+    if any(char in field for char in CSV_SPECIAL_CHARACTERS):
+        return '"' + field.replace('"', '""') + '"'
+
+    return field
+
+
+def format_csv_text(column: Sequence) -> List[str]:
+    """
+    Convert a column of values to csv fields, quoting them only if the column
+    contains any special characters
+    """
+    fields = format_csv_plain(column)
+    text = "".join(fields)
+    if any(char in text for char in CSV_SPECIAL_CHARACTERS):
+        return [quote_csv_field(field) for field in fields]
+
+    return fields
+
+
+def csv_column_formatter(type_code: Any) -> Callable[[Sequence], List[str]]:
+    """
+    Choose the csv formatter of a result column by its type,
+    the text of numbers, dates and timestamps never needs quoting
+    """
+    if isinstance(type_code, (DECIMAL, DATETIME64)) or type_code in (
+        int,
+        float,
+        bool,
+        Decimal,
+        date,
+        datetime,
+    ):
+        return format_csv_plain
+
+    return format_csv_text
+
+
+class CsvEncoder:
+    """
+    Encode batches of rows to csv text, the same as csv.writer does
+    with the default dialect. The formatter of each column is chosen once
+    from the result description, and the batches are converted column by column
+    instead of value by value.
+    """
+
+    def __init__(self, description: Sequence):
+        self.formatters = [
+            csv_column_formatter(column.type_code) for column in description
+        ]
+
+    def encode(self, batch: Sequence[Sequence]) -> str:
+        if len(batch) == 0:
+            return ""
+        if not self.formatters:
+            return CSV_LINE_TERMINATOR * len(batch)
+
+        columns = list(zip(*batch))
+        fields = [
+            formatter(column) for formatter, column in zip(self.formatters, columns)
+        ]
+        if len(fields) == 1:
+            # csv.writer quotes the single empty field, to not write an empty line
+            fields[0] = ['""' if field == "" else field for field in fields[0]]
+
+        return (
+            CSV_LINE_TERMINATOR.join(map(",".join, zip(*fields))) + CSV_LINE_TERMINATOR
+        )
+
+
+def render_csv(
+    headers: Optional[Sequence[str]],
+    batches: Iterable[Sequence[Sequence]],
+    description: Optional[Sequence] = None,
+) -> Iterator[str]:
+    """
+    Render the header row (if headers are provided) and the batches in csv format
+    the same way as csv.writer does, yield the text of each batch separately.
+    If the result description is provided, the batches are encoded
+    with a CsvEncoder of the column types
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if headers is not None:
+        writer.writerow(headers)
+        yield buffer.getvalue()
+
+    encoder = CsvEncoder(description) if description is not None else None
+
+    for batch in batches:
+        if not batch:
+            continue
+
+        if encoder is not None:
+            yield encoder.encode(batch)
+        else:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(batch)
+            yield buffer.getvalue()
+
+
+class ShardWriter:
+    """
+    Write text chunks to a sequence of optionally compressed files in a directory.
+    A file is closed once its size on disk passes max_file_size, and the following
+    chunks go to the next file. The name and the row count of each file are kept
+    for the manifest.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        extension: str,
+        compression: Optional[str] = None,
+        max_file_size: Optional[int] = None,
+    ):
+        self.directory = directory
+        self.extension = extension + COMPRESSION_EXTENSIONS.get(compression or "", "")
+        self.compression = compression
+        self.max_file_size = max_file_size
+        self.files: List[Dict[str, Any]] = []
+
+        self._result_set = -1
+        self._header: Optional[str] = None
+        self._raw: Optional[BinaryIO] = None
+        self._stream: Optional[IO[bytes]] = None
+
+        if compression == ZSTD_COMPRESSION:
+            # zstandard is an optional dependency, fail before any file is written
+            import_zstandard()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def start_result_set(self, header: Optional[str]) -> None:
+        """
+        Start a new file with the header, that is repeated in each file of the set
+        """
+        self.close()
+        self._result_set += 1
+        self._header = header
+
+    def _open(self) -> IO[bytes]:
+        name = "part-{:05d}{}".format(len(self.files), self.extension)
+        raw = open(os.path.join(self.directory, name), "wb")
+
+        stream: IO[bytes] = raw
+        if self.compression == GZIP_COMPRESSION:
+            # GzipFile implements the binary file interface without subclassing IO
+            stream = cast(IO[bytes], gzip.GzipFile(fileobj=raw, mode="wb"))
+        elif self.compression == ZSTD_COMPRESSION:
+            stream = (
+                import_zstandard().ZstdCompressor().stream_writer(raw, closefd=False)
+            )
+
+        self.files.append({"file": name, "result_set": self._result_set, "rows": 0})
+        if self._header:
+            stream.write(self._header.encode("utf-8"))
+
+        self._raw, self._stream = raw, stream
+        return stream
+
+    def write(self, chunk: str, rows: int) -> None:
+        stream = self._stream or self._open()
+        stream.write(chunk.encode("utf-8"))
+        self.files[-1]["rows"] += rows
+
+        if self.max_file_size is not None:
+            # compressors buffer the data, flush it to know the actual file size
+            stream.flush()
+            assert self._raw is not None
+            if self._raw.tell() >= self.max_file_size:
+                self.close()
+
+    def close(self) -> None:
+        if self._stream is None or self._raw is None:
+            return
+
+        if self._stream is not self._raw:
+            self._stream.close()
+
+        self.files[-1]["bytes"] = self._raw.tell()
+        self._raw.close()
+        self._stream, self._raw = None, None
+
+    def write_manifest(self, **properties: Any) -> None:
+        self.close()
+        with open(os.path.join(self.directory, MANIFEST_FILE), "w") as manifest:
+            json.dump(
+                {
+                    **properties,
+                    "compression": self.compression,
+                    "rows": sum(file["rows"] for file in self.files),
+                    "files": self.files,
+                },
+                manifest,
+                indent=4,
+            )
+
+
+def import_zstandard() -> Any:
+    """
+    zstandard is an optional dependency, it is imported only if zstd compression
+    is requested
+    """
+    try:
+        import zstandard  # type: ignore
+    except ImportError:
+        raise FireboltError(
+            "zstandard is required for zstd compression, "
+            "install it with: pip install firebolt-cli[zstd]"
+        )
+
+    return zstandard
+
+
+def import_pyarrow() -> Any:
+    """
+    pyarrow is an optional dependency, it is imported only if a columnar
+    output format is requested
+    """
+    try:
+        import pyarrow  # type: ignore
+        import pyarrow.parquet  # type: ignore
+    except ImportError:
+        raise FireboltError(
+            "pyarrow is required for this output format, "
+            "install it with: pip install firebolt-cli[arrow]"
+        )
+
+    return pyarrow
+
+
+def import_orjson() -> Any:
+    """
+    orjson is only used to speed up the json output if it is installed
+    """
+    try:
+        import orjson  # type: ignore
+    except ImportError:
+        return None
+
+    return orjson
+
+
+def arrow_type(pa: Any, type_code: Any) -> Any:
+    """
+    Convert the type of a result column to the corresponding arrow type,
+    unknown types are kept as strings
+    """
+    if isinstance(type_code, ARRAY):
+        return pa.list_(arrow_type(pa, type_code.subtype))
+    if isinstance(type_code, DECIMAL):
+        if type_code.precision > 38:
+            return pa.decimal256(type_code.precision, type_code.scale)
+        return pa.decimal128(type_code.precision, type_code.scale)
+    if isinstance(type_code, DATETIME64):
+        return pa.timestamp("us")
+
+    return {
+        int: pa.int64(),
+        float: pa.float64(),
+        bool: pa.bool_(),
+        date: pa.date32(),
+        datetime: pa.timestamp("us"),
+    }.get(type_code, pa.string())
+
+
+def arrow_schema(pa: Any, description: Sequence) -> Any:
+    return pa.schema(
+        [
+            pa.field(column.name, arrow_type(pa, column.type_code))
+            for column in description
+        ]
+    )
+
+
+def arrow_record_batch(pa: Any, schema: Any, rows: Sequence[Sequence]) -> Any:
+    """
+    Transpose the rows of a batch into arrow columns of the schema types
+    """
+    columns = zip(*rows) if rows else [[] for _ in schema]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def write_parquet(
+    path: str, description: Sequence, batches: Iterable[Sequence[Sequence]]
+) -> None:
+    """
+    Write the batches to a parquet file, each batch becomes a separate row group,
+    so only a single row group is kept in memory
+    """
+    pa = import_pyarrow()
+    schema = arrow_schema(pa, description)
+
+    writer = pa.parquet.ParquetWriter(path, schema)
+    try:
+        for batch in batches:
+            if batch:
+                writer.write_table(
+                    pa.Table.from_batches([arrow_record_batch(pa, schema, batch)]),
+                    row_group_size=len(batch),
+                )
+    finally:
+        writer.close()
+
+
+def write_arrow_stream(
+    stream: BinaryIO, description: Sequence, batches: Iterable[Sequence[Sequence]]
+) -> None:
+    """
+    Write the batches to the binary stream in arrow IPC streaming format,
+    each batch becomes a separate record batch
+    """
+    pa = import_pyarrow()
+    schema = arrow_schema(pa, description)
+
+    writer = pa.ipc.new_stream(stream, schema)
+    try:
+        for batch in batches:
+            if batch:
+                writer.write_batch(arrow_record_batch(pa, schema, batch))
+    finally:
+        writer.close()
+    stream.flush()
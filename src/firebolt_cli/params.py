@@ -0,0 +1,113 @@
+import csv
+import json
+import os
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from firebolt.common.exception import FireboltError
+
+# extensions of the newline delimited json parameter files,
+# the other files are read as csv with a header
+NDJSON_EXTENSIONS = [".ndjson", ".jsonl"]
+
+# types, which could be declared for a column in the header of a csv file,
+# e.g. id:int, the values of the other columns are bound as text
+CSV_TYPES: Dict[str, Callable[[str], Any]] = {"int": int, "float": float, "text": str}
+
+
+def split_csv_name(name: str) -> Tuple[str, Callable[[str], Any]]:
+    """
+    split the name of a csv column into the name and the declared type
+    """
+    base, _, type_name = name.rpartition(":")
+    if base and type_name in CSV_TYPES:
+        return base, CSV_TYPES[type_name]
+
+    return name, str
+
+
+def parse_csv_value(value: str, type_: Callable[[str], Any] = str) -> Any:
+    """
+    An empty field is bound as null, the rest as the declared type of the column,
+    text by default, so e.g. ids compared to text columns and codes
+    with leading zeros stay as they are
+    """
+    if value == "":
+        return None
+
+    return type_(value)
+
+
+class ParameterFile:
+    """
+    Read the rows of query parameters lazily from a csv file with a header,
+    or from a newline delimited json file with an object on each line.
+    The names of the parameters come from the header, or from the keys
+    of the first object, and the values are ordered by them
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ndjson = os.path.splitext(path)[1].lower() in NDJSON_EXTENSIONS
+
+        self._file: IO[str] = open(path, newline="", encoding="utf-8")
+        self._first: Optional[dict] = None
+        if self.ndjson:
+            self._first = self._read_object()
+            self.names = list(self._first) if self._first is not None else []
+        else:
+            self._reader = csv.reader(self._file)
+            columns = [split_csv_name(name) for name in next(self._reader, [])]
+            self.names = [name for name, _ in columns]
+            self.types = [type_ for _, type_ in columns]
+
+    def _read_object(self) -> Optional[dict]:
+        for line in self._file:
+            if not line.strip():
+                continue
+
+            value = json.loads(line)
+            if not isinstance(value, dict):
+                raise FireboltError(f"Each line of {self.path} should be a json object")
+            return value
+
+        return None
+
+    def __iter__(self) -> Iterator[List[Any]]:
+        if not self.ndjson:
+            for row in self._reader:
+                if len(row) != len(self.names):
+                    raise FireboltError(
+                        f"Line {self._reader.line_num} of {self.path} has "
+                        f"{len(row)} values, the header has {len(self.names)}"
+                    )
+                try:
+                    values = [
+                        parse_csv_value(value, type_)
+                        for value, type_ in zip(row, self.types)
+                    ]
+                except ValueError as err:
+                    raise FireboltError(
+                        f"Line {self._reader.line_num} of {self.path}: {err}"
+                    )
+                yield values
+            return
+
+        value = self._first
+        while value is not None:
+            unknown = set(value) - set(self.names)
+            if unknown:
+                raise FireboltError(
+                    f"Parameters {', '.join(sorted(unknown))} of {self.path} "
+                    "are not in its first line"
+                )
+            yield [value.get(name) for name in self.names]
+            value = self._read_object()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ParameterFile":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
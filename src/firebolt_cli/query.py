@@ -1,57 +1,1246 @@
-import csv
 import os
+import shutil
 import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import nullcontext
+from functools import partial
+from itertools import chain
+from typing import (
+    BinaryIO,
+    ContextManager,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import click
-from click import command, echo, option
+from click import (
+    command,
+    echo,
+    echo_via_pager,
+    get_binary_stream,
+    group,
+    option,
+)
+from firebolt.async_db import connect as async_connect
+from firebolt.client import Auth, Client
 from firebolt.common.exception import FireboltError
-from firebolt.db import Cursor
-from firebolt.db.connection import connect
+from firebolt.db import Connection, Cursor
+from firebolt.db.connection import DEFAULT_TIMEOUT_SECONDS, connect
+from firebolt.service.types import EngineStatusSummary
+from httpx import HTTPStatusError, Timeout, TransportError
 from prompt_toolkit.application import get_app
 from prompt_toolkit.enums import DEFAULT_BUFFER
 from prompt_toolkit.filters import Condition
 from prompt_toolkit.lexers import PygmentsLexer
 from prompt_toolkit.shortcuts import PromptSession
 from pygments.lexers import PostgresLexer
-from tabulate import tabulate
 
+from firebolt_cli.async_runner import AsyncStatementRunner, StatementResults
 from firebolt_cli.common_options import (
+    bytes_from_string,
     common_options,
     default_from_config_file,
+    format_option,
+    json_option,
+)
+from firebolt_cli.dag import (
+    ScriptStatement,
+    critical_path,
+    statement_dependencies,
 )
+from firebolt_cli.diff import (
+    DIFF_LIMIT,
+    ResultDiff,
+    diff_ordered,
+    diff_unordered,
+)
+from firebolt_cli.output import (
+    ARROW_FORMAT,
+    COMPRESSION_EXTENSIONS,
+    CSV_FORMAT,
+    EXPANDED_FORMAT,
+    JSON_FORMAT,
+    NDJSON_FORMAT,
+    PARQUET_FORMAT,
+    ROW_GROUP_SIZE,
+    TABULAR_FORMAT,
+    CsvEncoder,
+    ShardWriter,
+    render_csv,
+    render_expanded,
+    render_grid,
+    render_json,
+    render_ndjson,
+    write_arrow_stream,
+    write_parquet,
+)
+from firebolt_cli.params import ParameterFile
+from firebolt_cli.script import ScriptReader, is_set_statement
+from firebolt_cli.stats import STATS_HEADERS, ResultStats
 from firebolt_cli.utils import (
+    PREVIEW_ROWS,
+    SPILL_THRESHOLD,
+    BalancedConnectionPool,
+    ConnectionPool,
+    PageFetcher,
+    ResultChecksum,
+    SpillBuffer,
+    construct_default_command_group,
     construct_resource_manager,
     exit_on_firebolt_exception,
     get_default_database_engine,
+    prepare_execution_result_table,
     read_from_file,
     read_from_stdin_buffer,
+    result_batches,
+    stdin_buffer_has_data,
 )
 
 EXIT_COMMANDS = [".exit", ".quit", ".q"]
 HELP_COMMANDS = [".help", ".h"]
 TABLES_COMMAND = ".tables"
-INTERNAL_COMMANDS = EXIT_COMMANDS + HELP_COMMANDS + [TABLES_COMMAND]
+SUMMARY_COMMAND = ".summary"
+MORE_COMMAND = ".more"
+EXPANDED_COMMAND = ".expanded"
+INTERNAL_COMMANDS = [
+    *EXIT_COMMANDS,
+    *HELP_COMMANDS,
+    TABLES_COMMAND,
+    SUMMARY_COMMAND,
+    MORE_COMMAND,
+    EXPANDED_COMMAND,
+]
+
+RAW_OUTPUT_FORMAT = "TabSeparatedWithNames"
+
+# formats, which are written to the --output file instead of stdout
+FILE_OUTPUT_FORMATS = [PARQUET_FORMAT]
+# binary formats with a single schema, which cannot hold multiple result sets
+SINGLE_RESULT_FORMATS = [PARQUET_FORMAT, ARROW_FORMAT]
+# text formats, which could be split into multiple files with --output-dir
+SHARDED_OUTPUT_FORMATS = [CSV_FORMAT, NDJSON_FORMAT]
+
+# description of the parameter columns printed before the result of --params,
+# the output formats only use the name and the type of a column
+ParameterColumn = namedtuple("ParameterColumn", "name type_code")
+
+# number of statements per connection read ahead of the printed one,
+# when a script is executed in parallel
+SCRIPT_READ_AHEAD = 2
+# a pipelined script executes the next statement on the second connection,
+# while the result of the current one is printed
+PIPELINE_CONNECTIONS = 2
+
+
+def connection_arguments(
+    engine_name_or_url: Optional[str], **raw_config_options: str
+) -> Dict[str, Optional[str]]:
+    """
+    Return the arguments of connect for the engine by its name or url,
+    or for the default engine of the database if it is not specified
+    """
+    # Decide whether to store the value as engine_name or engine_url
+    # '.' symbol should always be in url and cannot be in engine_name
+    engine_name, engine_url = engine_name_or_url, None
+
+    if engine_name is None:
+        rm = construct_resource_manager(**raw_config_options)
+        engine_name = get_default_database_engine(
+            rm, raw_config_options["database_name"]
+        ).name
+    elif "." in engine_name:
+        engine_name, engine_url = None, engine_name
+
+    return dict(
+        engine_url=engine_url,
+        engine_name=engine_name,
+        database=raw_config_options["database_name"],
+        username=raw_config_options["username"],
+        password=raw_config_options["password"],
+        api_endpoint=raw_config_options["api_endpoint"],
+        account_name=raw_config_options["account_name"],
+    )
+
+
+def connect_to_engine(
+    engine_name_or_url: Optional[str], **raw_config_options: str
+) -> Connection:
+    """
+    Connect to the engine by its name or url,
+    or to the default engine of the database if it is not specified
+    """
+    return connect(**connection_arguments(engine_name_or_url, **raw_config_options))
+
+
+def split_engine_names(engine_names: Optional[str]) -> List[str]:
+    """
+    split the comma separated names or urls of the engines
+    """
+    if not engine_names:
+        return []
+
+    return [name.strip() for name in engine_names.split(",") if name.strip()]
+
+
+def running_engines(
+    engine_names: Sequence[str], **raw_config_options: str
+) -> List[str]:
+    """
+    Return the engines, which are running, out of the engines given by name
+    or url, the others are reported to stderr. The urls are not checked
+    """
+    rm = construct_resource_manager(**raw_config_options)
+
+    running = []
+    for name in engine_names:
+        if "." not in name:
+            try:
+                engine = rm.engines.get_by_name(name=name)
+            except (FireboltError, HTTPStatusError, TransportError) as err:
+                echo(f"Engine {name} is skipped: {err}", err=True)
+                continue
+
+            if (
+                engine.current_status_summary
+                != EngineStatusSummary.ENGINE_STATUS_SUMMARY_RUNNING
+            ):
+                status = (
+                    engine.current_status_summary.name
+                    if engine.current_status_summary
+                    else None
+                )
+                echo(f"Engine {name} is skipped, it is in {status} state", err=True)
+                continue
+
+        running.append(name)
+
+    if not running:
+        raise FireboltError("None of the engines is running")
+
+    return running
 
 
-def print_result_if_any(cursor: Cursor, use_csv: bool) -> None:
+def open_connection_pool(
+    connection: Connection,
+    engines: Sequence[str],
+    size: int,
+    **raw_config_options: str,
+) -> ConnectionPool:
     """
-    Fetch the data from cursor and print it in csv or tabular format
+    Open a pool of size connections to the engine of connection, or, if several
+    engines are given, a pool balanced over the pools of each of them.
+    The connection is the first connection to the first engine
     """
+    # the other connections go to the resolved url of the engine
+    pool = ConnectionPool(
+        partial(connect_to_engine, connection.engine_url, **raw_config_options),
+        size,
+        connection,
+    )
+    if len(engines) <= 1:
+        return pool
+
+    return BalancedConnectionPool(
+        [(engines[0], pool)]
+        + [
+            (
+                engine,
+                ConnectionPool(
+                    partial(connect_to_engine, engine, **raw_config_options), size
+                ),
+            )
+            for engine in engines[1:]
+        ],
+        size,
+    )
+
+
+def print_result_if_any(
+    cursor: Cursor,
+    output_format: str = TABULAR_FORMAT,
+    output_file: Optional[str] = None,
+    row_group_size: int = ROW_GROUP_SIZE,
+    memory_budget: Optional[int] = None,
+    pager: bool = False,
+    compact: bool = False,
+) -> None:
+    """
+    Fetch the data from cursor and print it in csv, json, ndjson, arrow
+    or tabular format, or write it to the parquet output_file.
+    The output is streamed batch by batch. With memory_budget
+    the batch size is adjusted to keep each batch within the budget.
+    With pager the text output longer than the terminal is shown in a pager
+    """
+    result_written = False
+
     while 1:
         if cursor.description:
-            data = cursor.fetchall()
+            if output_format in SINGLE_RESULT_FORMATS and result_written:
+                raise FireboltError(
+                    f"{output_format} output supports only a single result set"
+                )
+
+            write_result(
+                cursor.description,
+                output_format,
+                result_batches(
+                    cursor,
+                    row_group_size if output_format == PARQUET_FORMAT else None,
+                    memory_budget,
+                ),
+                output_file,
+                pager,
+                compact,
+            )
+
+            result_written = True
+
+        if not cursor.nextset():
+            break
+
+
+def write_result(
+    description: Sequence,
+    output_format: str,
+    batches: Iterable[Sequence[Sequence]],
+    output_file: Optional[str] = None,
+    pager: bool = False,
+    compact: bool = False,
+) -> None:
+    """
+    Write the batches of a result set with the description in the output format,
+    json is written without indentation if compact is set
+    """
+    headers = [i.name for i in description]
+
+    if output_format == PARQUET_FORMAT:
+        assert output_file is not None
+        write_parquet(
+            output_file,
+            description,
+            batches,
+        )
+    elif output_format == ARROW_FORMAT:
+        write_arrow_stream(
+            get_binary_stream("stdout"),
+            description,
+            batches,
+        )
+    elif pager:
+        if output_format == CSV_FORMAT:
+            chunks: Iterable[str] = render_csv(headers, batches, description)
+        elif output_format == JSON_FORMAT:
+            chunks = chain(render_json(headers, batches, compact, default=str), ["\n"])
+        elif output_format == NDJSON_FORMAT:
+            chunks = (f"{chunk}\n" for chunk in render_ndjson(headers, batches))
+        else:
+            chunks = (
+                f"{chunk}\n" for chunk in render_table(headers, batches, output_format)
+            )
+        echo_via_pager_if_long(chunks)
+    elif output_format == CSV_FORMAT:
+        for chunk in render_csv(headers, batches, description):
+            sys.stdout.write(chunk)
+    elif output_format == JSON_FORMAT:
+        for chunk in render_json(headers, batches, compact, default=str):
+            sys.stdout.write(chunk)
+        echo()
+    elif output_format == NDJSON_FORMAT:
+        for chunk in render_ndjson(headers, batches):
+            echo(chunk)
+    else:
+        for chunk in render_table(headers, batches, output_format):
+            echo(chunk)
+
+
+def render_table(
+    headers: Sequence[str],
+    batches: Iterable[Sequence[Sequence]],
+    output_format: str = TABULAR_FORMAT,
+) -> Iterable[str]:
+    """
+    Render the batches in the tabular or expanded format, fitted into the width
+    of the terminal, if the output goes to the terminal
+    """
+    max_width = shutil.get_terminal_size().columns if sys.stdout.isatty() else None
+
+    if output_format == EXPANDED_FORMAT:
+        return render_expanded(headers, batches, max_width=max_width)
+
+    return render_grid(headers, batches, max_width=max_width)
+
+
+def echo_via_pager_if_long(chunks: Iterable[str]) -> None:
+    """
+    Print the chunks of text, or show them in the pager ($PAGER or the default one
+    of click), if they don't fit into the terminal. The pager reads the chunks
+    one by one, so the rest of the rows is rendered only as the pager scrolls
+    """
+    # one line of the terminal is left for the prompt
+    height = shutil.get_terminal_size().lines - 1
+
+    chunks = iter(chunks)
+    leading_chunks: List[str] = []
+    lines = 0
+    for chunk in chunks:
+        leading_chunks.append(chunk)
+        lines += chunk.count("\n")
+        if lines > height:
+            echo_via_pager(chain(leading_chunks, chunks))
+            return
+
+    for chunk in leading_chunks:
+        echo(chunk, nl=False)
+
+
+def write_result_shards(
+    cursor: Cursor,
+    output_dir: str,
+    output_format: str = CSV_FORMAT,
+    compression: Optional[str] = None,
+    max_file_size: Optional[int] = None,
+    memory_budget: Optional[int] = None,
+) -> None:
+    """
+    Fetch the data from cursor and write it in csv or ndjson format to a sequence
+    of files in output_dir, each file is closed once it is larger than
+    max_file_size. The files are listed with their row counts in the manifest.
+    """
+    writer = ShardWriter(output_dir, f".{output_format}", compression, max_file_size)
 
+    while 1:
+        if cursor.description:
             headers = [i.name for i in cursor.description]
-            if use_csv:
-                writer = csv.writer(sys.stdout)
-                writer.writerow(headers)
-                writer.writerows(data)
+
+            if output_format == CSV_FORMAT:
+                # csv header is repeated in each file, so any file could be loaded
+                writer.start_result_set("".join(render_csv(headers, [])))
             else:
-                echo(tabulate(data, headers=headers, tablefmt="grid"))
+                writer.start_result_set(None)
+
+            encoder = CsvEncoder(cursor.description)
+            for batch in result_batches(cursor, memory_budget=memory_budget):
+                if output_format == CSV_FORMAT:
+                    chunk = encoder.encode(batch)
+                else:
+                    chunk = "".join(render_ndjson(headers, [batch])) + "\n"
+                writer.write(chunk, len(batch))
 
         if not cursor.nextset():
             break
 
+    writer.write_manifest(format=output_format)
+
+
+def print_raw_result(
+    connection: Connection, sql_query: str, **raw_config_options: str
+) -> None:
+    """
+    Execute the query with the server side output format
+    and stream the response body to stdout as is, no rows are parsed
+    """
+    with Client(
+        auth=Auth(
+            username=raw_config_options["username"],
+            password=raw_config_options["password"],
+            api_endpoint=raw_config_options["api_endpoint"],
+        ),
+        base_url=connection.engine_url,
+        api_endpoint=raw_config_options["api_endpoint"],
+        timeout=Timeout(DEFAULT_TIMEOUT_SECONDS, read=None),
+    ) as client:
+        with client.stream(
+            "POST",
+            "/",
+            params={
+                "database": connection.database,
+                "output_format": RAW_OUTPUT_FORMAT,
+            },
+            content=sql_query,
+        ) as response:
+            if response.is_error:
+                response.read()
+                raise FireboltError(response.text)
+
+            stdout = get_binary_stream("stdout")
+            for chunk in response.iter_bytes():
+                stdout.write(chunk)
+            stdout.flush()
+
+
+def print_result_checksum(
+    cursor: Cursor, ordered: bool = False, memory_budget: Optional[int] = None
+) -> None:
+    """
+    Fetch the data from cursor and print only the row count and the checksum
+    of each result set
+    """
+    while 1:
+        if cursor.description:
+            checksum = ResultChecksum(ordered)
+            for batch in result_batches(cursor, memory_budget=memory_budget):
+                checksum.update(batch)
+
+            echo(f"Rows: {checksum.row_count}, checksum: {checksum.hexdigest()}")
+
+        if not cursor.nextset():
+            break
+
+
+def print_result_stats(
+    cursor: Cursor,
+    output_format: str = TABULAR_FORMAT,
+    memory_budget: Optional[int] = None,
+) -> None:
+    """
+    Fetch the data from cursor and print only the statistics of each column
+    of each result set, the rows are streamed through once and not rendered
+    """
+    while 1:
+        if cursor.description:
+            stats = ResultStats([i.name for i in cursor.description])
+            for batch in result_batches(cursor, memory_budget=memory_budget):
+                stats.update(batch)
+
+            rows = stats.rows()
+            if output_format == CSV_FORMAT:
+                sys.stdout.write("".join(render_csv(STATS_HEADERS, [rows])))
+            elif output_format == JSON_FORMAT:
+                echo("".join(render_json(STATS_HEADERS, [rows], default=str)))
+            elif output_format == NDJSON_FORMAT:
+                echo("\n".join(render_ndjson(STATS_HEADERS, [rows])))
+            else:
+                echo("\n".join(render_grid(STATS_HEADERS, [rows])))
+
+        if not cursor.nextset():
+            break
+
+
+def run_script(
+    cursor: Cursor,
+    script: ScriptReader,
+    output_format: str = TABULAR_FORMAT,
+    memory_budget: Optional[int] = None,
+    compact: bool = False,
+) -> None:
+    """
+    Execute the statements of the script one by one, as they are read,
+    print their results and report the progress to stderr
+    """
+    for number, statement in enumerate(script, start=1):
+        start_time = time.monotonic()
+        try:
+            cursor.execute(statement)
+            print_result_if_any(
+                cursor, output_format, memory_budget=memory_budget, compact=compact
+            )
+        except FireboltError as err:
+            raise FireboltError(f"Statement {number} failed: {err}")
+
+        echo_statement_done(number, time.monotonic() - start_time, script.progress)
+
+
+def echo_statement_done(
+    number: int, duration: float, progress: Optional[float] = None
+) -> None:
+    """
+    report the time of the statement and the share of the script done to stderr
+    """
+    echo(
+        f"Statement {number} done in {duration:.2f}s"
+        + (f", {progress:.0%} of the script" if progress is not None else ""),
+        err=True,
+    )
+
+
+def execute_buffered(
+    pool: ConnectionPool,
+    statement: str,
+    parameters: Optional[Sequence] = None,
+    memory_budget: Optional[int] = None,
+    spill_threshold: int = SPILL_THRESHOLD,
+) -> Tuple[StatementResults, float]:
+    """
+    Execute the statement with the parameters on a connection of the pool
+    and fetch all its result sets into SpillBuffers, so the connection is free
+    for the next statement. Return the descriptions and the buffers
+    of the result sets, and the time the statement took.
+    A SET statement is applied to all the connections of the pool
+    """
+    start_time = time.monotonic()
+    results: StatementResults = []
+
+    if parameters is None and is_set_statement(statement):
+        pool.apply_setting(statement)
+        return results, time.monotonic() - start_time
+
+    try:
+        with pool.cursor() as cursor:
+            cursor.execute(statement, parameters)
+            while 1:
+                if cursor.description:
+                    buffer = SpillBuffer(spill_threshold)
+                    results.append((cursor.description, buffer))
+                    buffer.extend(result_batches(cursor, None, memory_budget))
+
+                if not cursor.nextset():
+                    break
+    except BaseException:
+        for _, buffer in results:
+            buffer.close()
+        raise
+
+    return results, time.monotonic() - start_time
+
+
+def execute_on_pool(
+    pool: ConnectionPool, statement: str
+) -> Tuple[Optional[Cursor], float]:
+    """
+    Execute the statement with the cursor of a connection of the pool,
+    return the cursor, which has to be released, once it is read,
+    and the time the execution took. A SET statement is applied
+    to all the connections of the pool, and no cursor is returned
+    """
+    start_time = time.monotonic()
+    if is_set_statement(statement):
+        pool.apply_setting(statement)
+        return None, time.monotonic() - start_time
+
+    cursor = pool.acquire_cursor()
+    try:
+        cursor.execute(statement)
+    except BaseException:
+        pool.release_cursor(cursor)
+        raise
+
+    return cursor, time.monotonic() - start_time
+
+
+def run_script_pipelined(
+    pool: ConnectionPool,
+    script: ScriptReader,
+    output_format: str = TABULAR_FORMAT,
+    memory_budget: Optional[int] = None,
+    compact: bool = False,
+) -> None:
+    """
+    Execute the statements of the script one after another, but start
+    the next statement on another connection of the pool, as soon as
+    the current one is executed, so the engine doesn't wait for its result
+    to be printed. The statements still see the changes of the earlier ones
+    """
+    statements = enumerate(script, start=1)
+
+    def submit(executor: ThreadPoolExecutor) -> Optional[Tuple[int, Future]]:
+        item = next(statements, None)
+        if item is None:
+            return None
+
+        number, statement = item
+        return number, executor.submit(execute_on_pool, pool, statement)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        current = submit(executor)
+        try:
+            while current is not None:
+                number, future = current
+                try:
+                    cursor, duration = future.result()
+                except FireboltError as err:
+                    current = None
+                    raise FireboltError(f"Statement {number} failed: {err}")
+
+                try:
+                    current = submit(executor)
+
+                    start_time = time.monotonic()
+                    try:
+                        if cursor is not None:
+                            print_result_if_any(
+                                cursor,
+                                output_format,
+                                memory_budget=memory_budget,
+                                compact=compact,
+                            )
+                    except FireboltError as err:
+                        raise FireboltError(f"Statement {number} failed: {err}")
+                finally:
+                    if cursor is not None:
+                        pool.release_cursor(cursor)
+
+                echo_statement_done(
+                    number, duration + time.monotonic() - start_time, script.progress
+                )
+        finally:
+            # the statement started ahead is dropped, once its execution is done
+            if current is not None and current[1].exception() is None:
+                cursor, _ = current[1].result()
+                if cursor is not None:
+                    pool.release_cursor(cursor)
+
+
+def execute_in_order(
+    pool: ConnectionPool,
+    statements: Iterable[Tuple[int, str, Optional[Sequence]]],
+    memory_budget: Optional[int] = None,
+    spill_threshold: int = SPILL_THRESHOLD,
+    kind: str = "Statement",
+) -> Iterator[Tuple[int, Optional[Sequence], StatementResults, float]]:
+    """
+    Execute the numbered statements with their parameters concurrently
+    on the connections of the pool, and yield their results in the order
+    of the statements, together with their parameters and durations.
+    The buffers of the results have to be closed by the caller.
+    Only a few statements per connection are read ahead of the yielded one,
+    the statements after a failed one are not executed. A SET statement runs
+    alone, after the earlier statements and before the following ones,
+    so it applies exactly to the statements after it
+    """
+    pending: Deque[Tuple[int, Optional[Sequence], Future]] = deque()
+    statements = iter(statements)
+    setting: Optional[Tuple[int, str, Optional[Sequence]]] = None
+    setting_running = False
+
+    try:
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            try:
+                while 1:
+                    while (
+                        not setting_running
+                        and len(pending) < pool.size * SCRIPT_READ_AHEAD
+                    ):
+                        item = setting or next(statements, None)
+                        if item is None:
+                            break
+
+                        number, statement, parameters = item
+                        setting = None
+                        if parameters is None and is_set_statement(statement):
+                            if pending:
+                                # wait for the earlier statements
+                                setting = item
+                                break
+                            setting_running = True
+
+                        future = executor.submit(
+                            execute_buffered,
+                            pool,
+                            statement,
+                            parameters,
+                            memory_budget,
+                            spill_threshold,
+                        )
+                        pending.append((number, parameters, future))
+
+                    if not pending:
+                        break
+
+                    number, parameters, future = pending[0]
+                    try:
+                        results, duration = future.result()
+                    except FireboltError as err:
+                        raise FireboltError(f"{kind} {number} failed: {err}")
+                    pending.popleft()
+                    setting_running = False
+
+                    yield number, parameters, results, duration
+            finally:
+                for _, _, future in pending:
+                    future.cancel()
+    finally:
+        # the results of the statements, which were not yielded, are dropped
+        for _, _, future in pending:
+            if not future.cancelled() and future.exception() is None:
+                for _, buffer in future.result()[0]:
+                    buffer.close()
+
+
+def run_script_parallel(
+    pool: ConnectionPool,
+    script: ScriptReader,
+    output_format: str = TABULAR_FORMAT,
+    memory_budget: Optional[int] = None,
+    spill_threshold: int = SPILL_THRESHOLD,
+    compact: bool = False,
+) -> None:
+    """
+    Execute the statements of the script concurrently on the connections
+    of the pool, and print their results in the order of the statements
+    """
+    executions = execute_in_order(
+        pool,
+        ((number, statement, None) for number, statement in enumerate(script, start=1)),
+        memory_budget,
+        spill_threshold,
+    )
+    for number, _, results, duration in executions:
+        for description, buffer in results:
+            with buffer:
+                write_result(
+                    description, output_format, buffer.batches(), compact=compact
+                )
+        echo_statement_done(number, duration, script.progress)
+
+
+def run_parameterized(
+    pool: ConnectionPool,
+    template: str,
+    parameters: ParameterFile,
+    output_format: str = TABULAR_FORMAT,
+    memory_budget: Optional[int] = None,
+    spill_threshold: int = SPILL_THRESHOLD,
+    compact: bool = False,
+) -> None:
+    """
+    Execute the query template once for each row of the parameters,
+    concurrently on the connections of the pool. The results are printed
+    as a single result in the order of the rows, with the parameters of a row
+    in front of the columns of its result
+    """
+    start_time = time.monotonic()
+    executions = execute_in_order(
+        pool,
+        (
+            (number, template, values)
+            for number, values in enumerate(parameters, start=1)
+        ),
+        memory_budget,
+        spill_threshold,
+        kind="Parameters row",
+    )
+    rows_done = 0
+
+    def tagged_batches(
+        headers: Sequence[str],
+        executions: Iterable[Tuple[int, Optional[Sequence], StatementResults, float]],
+    ) -> Iterator[Sequence[Sequence]]:
+        nonlocal rows_done
+
+        for number, values, results, _ in executions:
+            prefix = list(values or [])
+            try:
+                if len(results) > 1 or any(
+                    [column.name for column in description] != headers
+                    for description, _ in results
+                ):
+                    raise FireboltError(
+                        f"Parameters row {number} returned other columns, "
+                        "than the first row did"
+                    )
+
+                for _, buffer in results:
+                    for batch in buffer.batches():
+                        yield [[*prefix, *row] for row in batch]
+            finally:
+                for _, buffer in results:
+                    buffer.close()
+            rows_done += 1
+
+    # the rows without results, e.g. of inserts, are not printed
+    for execution in executions:
+        results = execution[2]
+        if results:
+            description = results[0][0]
+            write_result(
+                [ParameterColumn(name, str) for name in parameters.names]
+                + list(description),
+                output_format,
+                tagged_batches(
+                    [column.name for column in description],
+                    chain([execution], executions),
+                ),
+                compact=compact,
+            )
+            break
+        rows_done += 1
+
+    echo(
+        f"{rows_done} parameters rows done in {time.monotonic() - start_time:.2f}s",
+        err=True,
+    )
+
+
+def run_script_dag(
+    pool: ConnectionPool,
+    statements: Sequence[ScriptStatement],
+    output_format: str = TABULAR_FORMAT,
+    memory_budget: Optional[int] = None,
+    spill_threshold: int = SPILL_THRESHOLD,
+    compact: bool = False,
+) -> None:
+    """
+    Execute each statement of the script, as soon as the statements it depends on
+    are done, up to the size of the pool at once. The results are printed
+    in the order of the statements, and the critical path is reported in the end
+    """
+    dependencies = statement_dependencies(statements)
+    waiting_for = [set(deps) for deps in dependencies]
+    dependents: List[List[int]] = [[] for _ in statements]
+    for idx, deps in enumerate(dependencies):
+        for dep in deps:
+            dependents[dep].append(idx)
+
+    ready = deque(idx for idx, deps in enumerate(waiting_for) if not deps)
+    running: Dict[Future, int] = {}
+    done: Dict[int, List[Tuple[Sequence, SpillBuffer]]] = {}
+    durations: List[float] = [0.0] * len(statements)
+    printed = 0
+    start_time = time.monotonic()
+
+    try:
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            while ready or running:
+                while ready and len(running) < pool.size:
+                    idx = ready.popleft()
+                    future = executor.submit(
+                        execute_buffered,
+                        pool,
+                        statements[idx].text,
+                        None,
+                        memory_budget,
+                        spill_threshold,
+                    )
+                    running[future] = idx
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    idx = running.pop(future)
+                    try:
+                        done[idx], durations[idx] = future.result()
+                    except FireboltError as err:
+                        raise FireboltError(
+                            f"Statement {statements[idx].number} failed: {err}"
+                        )
+
+                    for dependent in dependents[idx]:
+                        waiting_for[dependent].discard(idx)
+                        if not waiting_for[dependent]:
+                            ready.append(dependent)
+
+                # print the results, which are not waiting for earlier statements
+                while printed in done:
+                    for description, buffer in done.pop(printed):
+                        with buffer:
+                            write_result(
+                                description,
+                                output_format,
+                                buffer.batches(),
+                                compact=compact,
+                            )
+                    echo_statement_done(
+                        statements[printed].number,
+                        durations[printed],
+                        (printed + 1) / len(statements),
+                    )
+                    printed += 1
+    finally:
+        # the results of the statements, which were not printed, are dropped
+        for future in running:
+            if future.exception() is None:
+                done[running[future]] = future.result()[0]
+        for results in done.values():
+            for _, buffer in results:
+                buffer.close()
+
+    path, path_duration = critical_path(dependencies, durations)
+    if path:
+        echo(
+            "Critical path: statements {} took {:.2f}s, the script took {:.2f}s".format(
+                ", ".join(str(statements[idx].number) for idx in path),
+                path_duration,
+                time.monotonic() - start_time,
+            ),
+            err=True,
+        )
+
+
+def run_script_async(
+    runner: AsyncStatementRunner,
+    script: ScriptReader,
+    output_format: str = TABULAR_FORMAT,
+    compact: bool = False,
+) -> None:
+    """
+    Execute the statements of the script with the asyncio runner,
+    and print their results in the order of the statements
+    """
+
+    def print_statement_result(
+        number: int, results: StatementResults, duration: float
+    ) -> None:
+        for description, buffer in results:
+            write_result(description, output_format, buffer.batches(), compact=compact)
+        echo_statement_done(number, duration, script.progress)
+
+    runner.run(enumerate(script, start=1), print_statement_result)
+
+
+def execute_script(
+    connection: Connection,
+    cursor: Cursor,
+    output_format: str,
+    engines: Sequence[str],
+    **raw_config_options: str,
+) -> None:
+    """
+    Execute the script from the file or stdin statement by statement with cursor,
+    or pipelined or in parallel over a pool of connections to the engines,
+    or on asyncio, if requested
+    """
+    script_size = (
+        os.path.getsize(raw_config_options["file"])
+        if raw_config_options["file"]
+        else None
+    )
+    memory_budget = (
+        int(raw_config_options["memory_budget"])
+        if raw_config_options["memory_budget"]
+        else None
+    )
+    parallel = int(raw_config_options["parallel"])
+    spill_threshold = int(raw_config_options["spill_threshold"])
+    compact = bool(raw_config_options["compact"])
+
+    with open_script(raw_config_options["file"]) as stream:
+        script = ScriptReader(stream, script_size)
+        if raw_config_options["async_connections"]:
+            async_connections = int(raw_config_options["async_connections"])
+            run_script_async(
+                AsyncStatementRunner(
+                    partial(
+                        async_connect,
+                        **connection_arguments(
+                            connection.engine_url, **raw_config_options
+                        ),
+                    ),
+                    async_connections,
+                    # each connection has at least one statement in flight
+                    max(parallel, async_connections),
+                    timeout=(
+                        float(raw_config_options["statement_timeout"])
+                        if raw_config_options["statement_timeout"]
+                        else None
+                    ),
+                    spill_threshold=spill_threshold,
+                ),
+                script,
+                output_format,
+                compact=compact,
+            )
+            return
+        if raw_config_options["pipeline"]:
+            parallel = PIPELINE_CONNECTIONS
+        elif parallel == 1 and not raw_config_options["dag"]:
+            run_script(
+                cursor,
+                script,
+                output_format,
+                memory_budget=memory_budget,
+                compact=compact,
+            )
+            return
+
+        with open_connection_pool(
+            connection, engines, parallel, **raw_config_options
+        ) as pool:
+            if raw_config_options["pipeline"]:
+                run_script_pipelined(
+                    pool,
+                    script,
+                    output_format,
+                    memory_budget=memory_budget,
+                    compact=compact,
+                )
+            elif raw_config_options["dag"]:
+                statements = [
+                    ScriptStatement(number, text)
+                    for number, text in enumerate(script, start=1)
+                ]
+                run_script_dag(
+                    pool,
+                    statements,
+                    output_format,
+                    memory_budget=memory_budget,
+                    spill_threshold=spill_threshold,
+                    compact=compact,
+                )
+            else:
+                run_script_parallel(
+                    pool,
+                    script,
+                    output_format,
+                    memory_budget=memory_budget,
+                    spill_threshold=spill_threshold,
+                    compact=compact,
+                )
+
+
+def is_script(**raw_config_options: str) -> bool:
+    """
+    whether the sql is requested to be executed as a script, statement by statement
+    """
+    return bool(
+        raw_config_options["script"]
+        or raw_config_options["dag"]
+        or raw_config_options["pipeline"]
+        or raw_config_options["async_connections"]
+        # the parameterized query runs in parallel once per row instead
+        or (
+            int(raw_config_options["parallel"]) > 1 and not raw_config_options["params"]
+        )
+    )
+
+
+def open_script(fpath: Optional[str]) -> ContextManager[BinaryIO]:
+    """
+    open the script file in binary mode, or use the binary stdin if fpath is None
+    """
+    if fpath is None:
+        return nullcontext(sys.stdin.buffer)
+
+    return open(fpath, "rb")
+
+
+def output_options_error(
+    sql_query: Optional[str], output_format: str, **raw_config_options: str
+) -> Optional[str]:
+    """
+    Check that the requested output options could be used together,
+    return the error message if they could not
+    """
+    if (
+        raw_config_options["statement_timeout"]
+        and not raw_config_options["async_connections"]
+    ):
+        return "--statement-timeout could be used only with --async-connections"
+    if len(split_engine_names(raw_config_options["engine_name"])) > 1 and (
+        not (
+            raw_config_options["params"]
+            or raw_config_options["dag"]
+            or int(raw_config_options["parallel"]) > 1
+        )
+        or raw_config_options["async_connections"]
+    ):
+        return "Several engines could be used only with --parallel, --dag or --params"
+    if raw_config_options["params"]:
+        if not sql_query:
+            return "--params is only available for a query from stdin or file"
+        if (
+            raw_config_options["script"]
+            or raw_config_options["dag"]
+            or raw_config_options["pipeline"]
+            or raw_config_options["async_connections"]
+            or output_format in SINGLE_RESULT_FORMATS
+            or raw_config_options["raw"]
+            or raw_config_options["checksum"]
+            or raw_config_options["stats_only"]
+            or raw_config_options["output_dir"]
+            or raw_config_options["output"]
+        ):
+            return (
+                "--params could be combined only with --parallel "
+                "and text output formats"
+            )
+    if is_script(**raw_config_options):
+        if not raw_config_options["file"] and sys.stdin.isatty():
+            return (
+                "--script, --parallel, --dag, --pipeline and --async-connections "
+                "are only available for a script from stdin or file"
+            )
+        if raw_config_options["pipeline"] and (
+            raw_config_options["dag"] or int(raw_config_options["parallel"]) > 1
+        ):
+            return "--pipeline cannot be combined with --parallel or --dag"
+        if raw_config_options["async_connections"] and (
+            raw_config_options["dag"] or raw_config_options["pipeline"]
+        ):
+            return "--async-connections cannot be combined with --dag or --pipeline"
+        if (
+            output_format in SINGLE_RESULT_FORMATS
+            or raw_config_options["raw"]
+            or raw_config_options["checksum"]
+            or raw_config_options["stats_only"]
+            or raw_config_options["output_dir"]
+            or raw_config_options["output"]
+        ):
+            return (
+                "--script, --parallel, --dag, --pipeline and --async-connections "
+                "could be combined only with text output formats"
+            )
+    if raw_config_options["checksum"]:
+        if not sql_query:
+            return "--checksum is only available for a query from stdin or file"
+        if (
+            output_format != TABULAR_FORMAT
+            or raw_config_options["raw"]
+            or raw_config_options["output_dir"]
+            or raw_config_options["output"]
+        ):
+            return "--checksum cannot be combined with other output options"
+    elif raw_config_options["ordered"]:
+        return "--ordered could be used only with --checksum"
+
+    if raw_config_options["stats_only"]:
+        if not sql_query:
+            return "--stats-only is only available for a query from stdin or file"
+        if (
+            output_format
+            not in [TABULAR_FORMAT, CSV_FORMAT, JSON_FORMAT, NDJSON_FORMAT]
+            or raw_config_options["raw"]
+            or raw_config_options["checksum"]
+            or raw_config_options["output_dir"]
+            or raw_config_options["output"]
+        ):
+            return (
+                "--stats-only could be combined only with csv, json or ndjson formats, "
+                "and not with other output options"
+            )
+
+    if raw_config_options["raw"] and (output_format != TABULAR_FORMAT or not sql_query):
+        return (
+            "Raw output is only available for a query from stdin or file, "
+            "and cannot be combined with --csv or --format"
+        )
+
+    if output_format in SINGLE_RESULT_FORMATS and not sql_query:
+        return (
+            f"{output_format} output is only available for a query from stdin or file"
+        )
+
+    if raw_config_options["output_dir"]:
+        if output_format not in SHARDED_OUTPUT_FORMATS:
+            return "--output-dir supports only {} formats".format(
+                ", ".join(SHARDED_OUTPUT_FORMATS)
+            )
+        if not sql_query:
+            return "--output-dir is only available for a query from stdin or file"
+    elif raw_config_options["compress"] or raw_config_options["max_file_size"]:
+        return "--compress and --max-file-size could be used only with --output-dir"
+
+    if output_format in FILE_OUTPUT_FORMATS:
+        if not raw_config_options["output"]:
+            return f"--output is required for {output_format} format"
+    elif raw_config_options["output"]:
+        return "--output is only supported for {} formats".format(
+            ", ".join(FILE_OUTPUT_FORMATS)
+        )
+
+    return None
+
 
 @Condition
 def is_multilne_needed() -> bool:
@@ -75,10 +1264,16 @@ def show_help() -> None:
         ["/".join(HELP_COMMANDS), "Show this help message"],
         ["/".join(EXIT_COMMANDS), "Exit firebolt-cli"],
         [TABLES_COMMAND, "Show tables in current database"],
+        [
+            f"{SUMMARY_COMMAND} <query>",
+            "Show the statistics of each column of the query result",
+        ],
+        [MORE_COMMAND, "Show the next rows of the query result"],
+        [EXPANDED_COMMAND, "Toggle the expanded output, a record for each row"],
     ]
 
     for internal_command, help_message in rows:
-        echo("{:<15s}".format(internal_command), nl=False)
+        echo("{:<20s}".format(internal_command), nl=False)
         echo(help_message)
 
 
@@ -94,13 +1289,61 @@ def process_internal_command(internal_command: str) -> str:
         return ""
     elif internal_command == TABLES_COMMAND:
         return "SHOW tables;"
+    elif internal_command == SUMMARY_COMMAND:
+        echo(f"Usage: {SUMMARY_COMMAND} <query>")
+        return ""
 
     raise ValueError(f"Not known internal command: {internal_command}")
 
 
-def enter_interactive_session(cursor: Cursor, use_csv: bool) -> None:
+def print_preview_page(
+    cursor: Cursor,
+    output_format: str,
+    page_size: int = PREVIEW_ROWS,
+    pages: Optional[PageFetcher] = None,
+    pager: bool = False,
+) -> Optional[PageFetcher]:
+    """
+    Print the next page of the results of cursor, or the first page of the current
+    result set, if pages is None. Return the pages of the result set to continue
+    with, or None if all the results are printed
+    """
+    while 1:
+        if pages is None:
+            if cursor.description:
+                pages = PageFetcher(cursor, page_size)
+            elif cursor.nextset():
+                continue
+            else:
+                return None
+
+        rows = pages.next_page()
+        # the last page could be empty, if the previous one was full
+        if rows or pages.row_count == 0:
+            write_result(cursor.description, output_format, [rows], pager=pager)
+
+        if not pages.exhausted:
+            echo(f"Type {MORE_COMMAND} to show the next {page_size} rows")
+            return pages
+
+        pages.close()
+        pages = None
+        if not cursor.nextset():
+            return None
+
+
+def enter_interactive_session(
+    cursor: Cursor,
+    output_format: str,
+    memory_budget: Optional[int] = None,
+    preview_rows: Optional[int] = None,
+    pager: bool = False,
+) -> None:
     """
-    Enters an infinite loop of interactive shell
+    Enters an infinite loop of interactive shell.
+    With preview_rows only the first rows of a result are printed, the next ones
+    are fetched in background and printed on .more.
+    With pager the results longer than the terminal are shown in a pager
     """
     echo("Connection succeeded")
 
@@ -111,19 +1354,63 @@ def enter_interactive_session(cursor: Cursor, use_csv: bool) -> None:
         multiline=is_multilne_needed,
     )
 
+    pages: Optional[PageFetcher] = None
+
     while 1:
         try:
             sql_query = session.prompt()
             sql_query = sql_query.strip().rstrip(";")
 
+            if sql_query == MORE_COMMAND:
+                if pages is None or preview_rows is None:
+                    echo("No more rows to show")
+                else:
+                    pages = print_preview_page(
+                        cursor, output_format, preview_rows, pages, pager
+                    )
+                continue
+
+            if sql_query == EXPANDED_COMMAND:
+                if output_format not in [TABULAR_FORMAT, EXPANDED_FORMAT]:
+                    echo(f"Expanded output is not available for {output_format}")
+                elif output_format == TABULAR_FORMAT:
+                    output_format = EXPANDED_FORMAT
+                    echo("Expanded output is on")
+                else:
+                    output_format = TABULAR_FORMAT
+                    echo("Expanded output is off")
+                continue
+
             if sql_query in INTERNAL_COMMANDS:
                 sql_query = process_internal_command(sql_query)
 
+            summary = False
+            words = sql_query.split(maxsplit=1)
+            if len(words) == 2 and words[0] == SUMMARY_COMMAND:
+                summary, sql_query = True, words[1]
+
             if len(sql_query) == 0:
                 continue
 
+            if pages is not None:
+                # the rest of the previous result is dropped
+                pages.close()
+                pages = None
+
             cursor.execute(sql_query)
-            print_result_if_any(cursor, use_csv=use_csv)
+            if summary:
+                print_result_stats(cursor, output_format, memory_budget)
+            elif preview_rows:
+                pages = print_preview_page(
+                    cursor, output_format, preview_rows, pager=pager
+                )
+            else:
+                print_result_if_any(
+                    cursor,
+                    output_format=output_format,
+                    memory_budget=memory_budget,
+                    pager=pager,
+                )
         except FireboltError as err:
             echo(err)
             continue
@@ -133,16 +1420,181 @@ def enter_interactive_session(cursor: Cursor, use_csv: bool) -> None:
             echo("Bye!")
             break
 
+    if pages is not None:
+        pages.close()
+
 
 @command()
 @common_options
 @option(
     "--engine-name",
-    help="Name or url of the engine to use for SQL queries",
+    help="Name or url of the engine to use for SQL queries, "
+    "or a comma separated list of engines to spread the statements "
+    "of --parallel, --dag or --params over",
     envvar="FIREBOLT_ENGINE_NAME",
     callback=default_from_config_file(required=False),
 )
 @option("--csv", help="Provide query output in csv format", is_flag=True, default=False)
+@json_option
+@format_option(
+    [
+        TABULAR_FORMAT,
+        EXPANDED_FORMAT,
+        CSV_FORMAT,
+        JSON_FORMAT,
+        NDJSON_FORMAT,
+        PARQUET_FORMAT,
+        ARROW_FORMAT,
+    ],
+    default=TABULAR_FORMAT,
+)
+@option(
+    "--output",
+    help="Path to the output file, required for parquet format",
+    default=None,
+    type=click.Path(dir_okay=False, writable=True),
+)
+@option(
+    "--output-dir",
+    help="Write csv or ndjson output to a sequence of files in the directory, "
+    "together with the manifest of the files",
+    default=None,
+    type=click.Path(file_okay=False, writable=True),
+)
+@option(
+    "--compress",
+    help="Compression of the files in --output-dir",
+    default=None,
+    type=click.Choice(list(COMPRESSION_EXTENSIONS.keys())),
+)
+@option(
+    "--max-file-size",
+    help="Start the next file in --output-dir, "
+    "once the current one is larger than this size, e.g. 256MB",
+    default=None,
+    callback=bytes_from_string,
+)
+@option(
+    "--memory-budget",
+    help="Memory for the fetched rows, e.g. 256MB, "
+    "the fetch batch size is adjusted to the size of the rows to fit in it",
+    default=None,
+    callback=bytes_from_string,
+)
+@option(
+    "--spill-threshold",
+    help="Size of a result kept in memory, while it waits to be printed "
+    "after the results of the earlier statements of a concurrent script "
+    "or rows of --params, larger results are moved to a temporary file",
+    default="64MB",
+    show_default=True,
+    callback=bytes_from_string,
+)
+@option(
+    "--preview-rows",
+    help="Number of rows of a result shown at once in the interactive session, "
+    f"the next rows are shown with {MORE_COMMAND}, 0 shows all the rows at once",
+    default=PREVIEW_ROWS,
+    show_default=True,
+    type=click.IntRange(min=0),
+)
+@option(
+    "--pager/--no-pager",
+    help="Show the results longer than the terminal in a pager "
+    "in the interactive session, $PAGER is used if it is set",
+    default=True,
+    show_default=True,
+)
+@option(
+    "--row-group-size",
+    help="Number of rows in a parquet row group, "
+    "only a single row group is kept in memory",
+    default=ROW_GROUP_SIZE,
+    show_default=True,
+    type=click.IntRange(min=1),
+)
+@option(
+    "--raw",
+    help="Stream the query result to stdout as returned by the engine, "
+    f"in {RAW_OUTPUT_FORMAT} format, without parsing the rows",
+    is_flag=True,
+    default=False,
+)
+@option(
+    "--checksum",
+    help="Print only the row count and the checksum of the query result, "
+    "to compare results without exporting them",
+    is_flag=True,
+    default=False,
+)
+@option(
+    "--ordered",
+    help="Make the --checksum depend on the order of the rows",
+    is_flag=True,
+    default=False,
+)
+@option(
+    "--stats-only",
+    help="Print only the count, null count, min, max, distinct estimate "
+    "and mean of each column of the query result, instead of its rows",
+    is_flag=True,
+    default=False,
+)
+@option(
+    "--script",
+    help="Execute the sql from stdin or file statement by statement, "
+    "the script is read lazily and the progress is reported to stderr",
+    is_flag=True,
+    default=False,
+)
+@option(
+    "--parallel",
+    help="Execute the statements of the script, or the query for the rows "
+    "of --params, concurrently over this number of connections, "
+    "the results are printed in the order of the statements or rows",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+)
+@option(
+    "--dag",
+    help="Execute each statement of the script as soon as the statements "
+    "it depends on are done, up to --parallel statements at once. "
+    "The dependencies are declared with @name and @depends in the comments "
+    "of the statements, or inferred from the tables they use",
+    is_flag=True,
+    default=False,
+)
+@option(
+    "--pipeline",
+    help="Execute the next statement of the script on another connection, "
+    "while the result of the current one is printed",
+    is_flag=True,
+    default=False,
+)
+@option(
+    "--async-connections",
+    help="Execute the statements of the script on asyncio over this number "
+    "of connections, with up to --parallel statements, but at least one "
+    "per connection, in flight at once",
+    default=None,
+    type=click.IntRange(min=1),
+)
+@option(
+    "--statement-timeout",
+    help="Cancel a statement executed with --async-connections, "
+    "which takes longer than this number of seconds",
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+)
+@option(
+    "--params",
+    help="Csv file with a header, or ndjson file, with the parameters "
+    "of the query. The query is executed once for each row, with the values "
+    "bound to its ? placeholders, up to --parallel rows at once",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+)
 @option(
     "--database-name",
     envvar="FIREBOLT_DATABASE_NAME",
@@ -158,51 +1610,272 @@ def enter_interactive_session(cursor: Cursor, use_csv: bool) -> None:
 @exit_on_firebolt_exception
 def query(**raw_config_options: str) -> None:
     """
-    Execute sql queries
+    Execute sql queries, see "query diff --help" to compare query results
     """
-    stdin_query = read_from_stdin_buffer()
-    file_query = read_from_file(raw_config_options["file"])
+    script_mode = is_script(**raw_config_options)
+    if script_mode:
+        # the script is read statement by statement, once connected
+        sql_query = None
+        both_specified = bool(raw_config_options["file"]) and stdin_buffer_has_data()
+    else:
+        stdin_query = read_from_stdin_buffer()
+        file_query = read_from_file(raw_config_options["file"])
+        both_specified = bool(stdin_query and file_query)
+
+        sql_query = stdin_query or file_query
 
-    if stdin_query and file_query:
+    if both_specified:
         echo(
-            "SQL request should be either read from stdin or file, both are specified",
+            "SQL request should be either read from stdin or file, "
+            "both are specified",
             err=True,
         )
         sys.exit(os.EX_USAGE)
 
-    sql_query = stdin_query or file_query
+    output_format = (
+        CSV_FORMAT
+        if raw_config_options["csv"]
+        else JSON_FORMAT
+        if raw_config_options["json"]
+        else raw_config_options["format"]
+    )
+    if raw_config_options["output_dir"] and output_format == TABULAR_FORMAT:
+        # tabular output is not meant for files, csv is the default for files
+        output_format = CSV_FORMAT
 
-    # Decide whether to store the value as engine_name or engine_url
-    # '.' symbol should always be in url and cannot be in engine_name
-    engine_name, engine_url = None, None
+    error = output_options_error(sql_query, output_format, **raw_config_options)
+    if error:
+        echo(error, err=True)
+        sys.exit(os.EX_USAGE)
 
-    if raw_config_options["engine_name"] is None:
-        rm = construct_resource_manager(**raw_config_options)
-        engine_name = get_default_database_engine(
-            rm, raw_config_options["database_name"]
-        ).name
-    else:
-        if "." in raw_config_options["engine_name"]:
-            engine_url = raw_config_options["engine_name"]
-        else:
-            engine_name = raw_config_options["engine_name"]
+    memory_budget = (
+        int(raw_config_options["memory_budget"])
+        if raw_config_options["memory_budget"]
+        else None
+    )
 
-    with connect(
-        engine_url=engine_url,
-        engine_name=engine_name,
-        database=raw_config_options["database_name"],
-        username=raw_config_options["username"],
-        password=raw_config_options["password"],
-        api_endpoint=raw_config_options["api_endpoint"],
-        account_name=raw_config_options["account_name"],
+    engines = split_engine_names(raw_config_options["engine_name"])
+    if len(engines) > 1:
+        engines = running_engines(engines, **raw_config_options)
+
+    with connect_to_engine(
+        engines[0] if engines else None, **raw_config_options
     ) as connection:
 
         cursor = connection.cursor()
 
-        if sql_query:
+        if script_mode:
+            execute_script(
+                connection, cursor, output_format, engines, **raw_config_options
+            )
+        elif sql_query and raw_config_options["params"]:
+            with ParameterFile(raw_config_options["params"]) as parameters:
+                with open_connection_pool(
+                    connection,
+                    engines,
+                    int(raw_config_options["parallel"]),
+                    **raw_config_options,
+                ) as pool:
+                    run_parameterized(
+                        pool,
+                        sql_query,
+                        parameters,
+                        output_format,
+                        memory_budget=memory_budget,
+                        spill_threshold=int(raw_config_options["spill_threshold"]),
+                        compact=bool(raw_config_options["compact"]),
+                    )
+        elif sql_query and raw_config_options["raw"]:
+            print_raw_result(connection, sql_query, **raw_config_options)
+        elif sql_query and raw_config_options["checksum"]:
+            cursor.execute(sql_query)
+            print_result_checksum(
+                cursor,
+                ordered=bool(raw_config_options["ordered"]),
+                memory_budget=memory_budget,
+            )
+        elif sql_query and raw_config_options["stats_only"]:
+            cursor.execute(sql_query)
+            print_result_stats(cursor, output_format, memory_budget=memory_budget)
+        elif sql_query and raw_config_options["output_dir"]:
+            cursor.execute(sql_query)
+            write_result_shards(
+                cursor,
+                raw_config_options["output_dir"],
+                output_format,
+                compression=raw_config_options["compress"],
+                max_file_size=(
+                    int(raw_config_options["max_file_size"])
+                    if raw_config_options["max_file_size"]
+                    else None
+                ),
+                memory_budget=memory_budget,
+            )
+        elif sql_query:
             # if query is available, then execute, print result and exit
             cursor.execute(sql_query)
-            print_result_if_any(cursor, bool(raw_config_options["csv"]))
+            print_result_if_any(
+                cursor,
+                output_format,
+                output_file=raw_config_options["output"],
+                row_group_size=int(raw_config_options["row_group_size"]),
+                memory_budget=memory_budget,
+                compact=bool(raw_config_options["compact"]),
+            )
         else:
             # otherwise start the interactive session
-            enter_interactive_session(cursor, bool(raw_config_options["csv"]))
+            enter_interactive_session(
+                cursor,
+                output_format,
+                memory_budget,
+                int(raw_config_options["preview_rows"]),
+                bool(raw_config_options["pager"]),
+            )
+
+
+def print_result_diff(diff: ResultDiff, headers: Sequence[str]) -> None:
+    """
+    Print the row counts of both sides and the rows found only on one of them
+    """
+    echo(f"Left rows: {diff.left_rows}, right rows: {diff.right_rows}")
+
+    for side, rows, count in [
+        ("left", diff.only_left, diff.only_left_count),
+        ("right", diff.only_right, diff.only_right_count),
+    ]:
+        echo(f"Rows only in {side}: {count}")
+        if rows:
+            echo(prepare_execution_result_table(rows, list(headers)))
+        if count > len(rows):
+            echo(f"... {count - len(rows)} more rows")
+
+
+@command()
+@common_options
+@option(
+    "--left-engine",
+    help="Name or url of the engine to run the left query on, "
+    "the default engine of the database is used if not specified",
+    default=None,
+)
+@option(
+    "--right-engine",
+    help="Name or url of the engine to run the right query on, "
+    "the left engine is used if not specified",
+    default=None,
+)
+@option(
+    "--database-name",
+    envvar="FIREBOLT_DATABASE_NAME",
+    help="Database name to use for SQL queries",
+    callback=default_from_config_file(),
+)
+@option(
+    "--file",
+    help="Path to the file with the sql query to run on both sides",
+    default=None,
+    type=click.Path(exists=True),
+)
+@option(
+    "--left-file",
+    help="Path to the file with the sql query of the left side",
+    default=None,
+    type=click.Path(exists=True),
+)
+@option(
+    "--right-file",
+    help="Path to the file with the sql query of the right side",
+    default=None,
+    type=click.Path(exists=True),
+)
+@option(
+    "--ordered",
+    help="Compare the rows by their position, "
+    "otherwise the order of the rows is ignored",
+    is_flag=True,
+    default=False,
+)
+@option(
+    "--limit",
+    help="Maximal number of different rows printed for each side",
+    default=DIFF_LIMIT,
+    show_default=True,
+    type=click.IntRange(min=0),
+)
+@exit_on_firebolt_exception
+def diff(**raw_config_options: str) -> None:
+    """
+    Compare the results of queries on two engines, or of two queries
+    """
+    stdin_query = read_from_stdin_buffer()
+    left_query = read_from_file(
+        raw_config_options["left_file"] or raw_config_options["file"]
+    )
+    right_query = read_from_file(
+        raw_config_options["right_file"] or raw_config_options["file"]
+    )
+
+    left_query, right_query = left_query or stdin_query, right_query or stdin_query
+    if not left_query or not right_query:
+        echo(
+            "SQL request for each side should be read from stdin, --file, "
+            "--left-file or --right-file",
+            err=True,
+        )
+        sys.exit(os.EX_USAGE)
+
+    left_engine = raw_config_options["left_engine"]
+    right_engine = raw_config_options["right_engine"] or left_engine
+
+    with connect_to_engine(
+        left_engine, **raw_config_options
+    ) as left_connection, connect_to_engine(
+        right_engine, **raw_config_options
+    ) as right_connection:
+        left_cursor, right_cursor = left_connection.cursor(), right_connection.cursor()
+
+        # both queries are run at once
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            left_execution = pool.submit(left_cursor.execute, left_query)
+            right_execution = pool.submit(right_cursor.execute, right_query)
+            left_execution.result(), right_execution.result()
+
+        if not left_cursor.description or not right_cursor.description:
+            raise FireboltError("Both queries should return a result to compare")
+
+        left_columns = [column.name for column in left_cursor.description]
+        right_columns = [column.name for column in right_cursor.description]
+        if left_columns != right_columns:
+            raise FireboltError(
+                f"The left query returns columns {', '.join(left_columns)}, "
+                f"the right query returns {', '.join(right_columns)}"
+            )
+
+        if raw_config_options["ordered"]:
+            result_diff = diff_ordered(
+                result_batches(left_cursor),
+                result_batches(right_cursor),
+                limit=int(raw_config_options["limit"]),
+            )
+        else:
+            result_diff = diff_unordered(
+                result_batches(left_cursor),
+                result_batches(right_cursor),
+                limit=int(raw_config_options["limit"]),
+            )
+
+        print_result_diff(result_diff, left_columns)
+
+    if not result_diff.equal:
+        sys.exit(1)
+
+
+@group(cls=construct_default_command_group("run"), name="query")
+def query_group() -> None:
+    """
+    Execute sql queries
+    """
+
+
+query_group.add_command(query, name="run")
+query_group.add_command(diff)
@@ -0,0 +1,181 @@
+import codecs
+import re
+from typing import BinaryIO, Iterator, List, Optional
+
+from firebolt.common.exception import FireboltError
+
+# size of the chunks a script is read in, only a single chunk
+# and the statement being read are kept in memory
+SCRIPT_CHUNK_SIZE = 1024 ** 2
+
+NORMAL = "normal"
+SINGLE_QUOTE = "single_quote"
+DOUBLE_QUOTE = "double_quote"
+LINE_COMMENT = "line_comment"
+BLOCK_COMMENT = "block_comment"
+
+# tokens, which start a string, an identifier or a comment, or end a statement
+START_TOKENS = re.compile(r"['\";]|--|/\*")
+START_STATES = {
+    "'": SINGLE_QUOTE,
+    '"': DOUBLE_QUOTE,
+    "--": LINE_COMMENT,
+    "/*": BLOCK_COMMENT,
+}
+# tokens, which end a string, an identifier or a comment,
+# a doubled quote inside of a string ends it and starts it again right away,
+# a character escaped with a backslash is skipped
+END_TOKENS = {
+    SINGLE_QUOTE: re.compile(r"\\[\s\S]|'"),
+    DOUBLE_QUOTE: re.compile(r'\\[\s\S]|"'),
+    LINE_COMMENT: re.compile("\n"),
+    BLOCK_COMMENT: re.compile(r"\*/"),
+}
+# the first character of a two-character token or an escape in a string,
+# which could be split between chunks
+SPLIT_TOKEN_CHARACTERS = "-/*\\"
+# a SET statement after any leading comments
+SET_STATEMENT = re.compile(r"(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*set\s", re.I | re.S)
+
+
+def is_set_statement(statement: str) -> bool:
+    """
+    whether the statement is a SET, the sdk keeps its value on the cursor
+    and sends it with the following statements of the cursor
+    """
+    return SET_STATEMENT.match(statement) is not None
+
+
+class StatementSplitter:
+    """
+    Split sql text into statements by the semicolons outside of strings,
+    quoted identifiers and comments. The text is fed chunk by chunk,
+    and the statements are returned as soon as they are complete.
+    Statements, which consist only of comments, are skipped.
+    """
+
+    def __init__(self) -> None:
+        self._state = NORMAL
+        self._parts: List[str] = []
+        self._has_code = False
+        self._held = ""
+
+    def feed(self, text: str) -> List[str]:
+        text, self._held = self._held + text, ""
+        end = len(text)
+
+        statements = []
+        start = pos = 0
+        while pos < end:
+            if self._state != NORMAL:
+                match = END_TOKENS[self._state].search(text, pos)
+                if match is None:
+                    if self._state != LINE_COMMENT:
+                        end = self._hold_split_token(text, pos)
+                    break
+                if not match.group().startswith("\\"):
+                    self._state = NORMAL
+                pos = match.end()
+                continue
+
+            match = START_TOKENS.search(text, pos)
+            code_end = match.start() if match else self._hold_split_token(text, pos)
+            if not self._has_code and text[pos:code_end].strip():
+                self._has_code = True
+            if match is None:
+                end = code_end
+                break
+
+            token, pos = match.group(), match.end()
+            if token == ";":
+                self._parts.append(text[start : match.start()])
+                statement = self._take_statement()
+                if statement is not None:
+                    statements.append(statement)
+                start = pos
+            else:
+                self._state = START_STATES[token]
+                if self._state in (SINGLE_QUOTE, DOUBLE_QUOTE):
+                    self._has_code = True
+
+        self._parts.append(text[start:end])
+        return statements
+
+    def finish(self) -> Optional[str]:
+        """
+        return the last statement, which is not terminated by a semicolon
+        """
+        if self._state == BLOCK_COMMENT:
+            raise FireboltError("The script ends inside of a /* comment */")
+
+        if self._state == NORMAL and self._held.strip():
+            self._has_code = True
+        self._parts.append(self._held)
+        self._held = ""
+
+        return self._take_statement()
+
+    def _take_statement(self) -> Optional[str]:
+        statement = "".join(self._parts).strip()
+        has_code = self._has_code
+
+        self._parts, self._has_code = [], False
+        return statement if has_code else None
+
+    def _hold_split_token(self, text: str, pos: int) -> int:
+        """
+        hold back the last character of the text, if it could be the first
+        character of a token continued in the next chunk,
+        return where the text fed so far ends
+        """
+        if len(text) > pos and text[-1] in SPLIT_TOKEN_CHARACTERS:
+            self._held = text[-1]
+            return len(text) - 1
+
+        return len(text)
+
+
+class ScriptReader:
+    """
+    Read the statements of an sql script from a binary stream lazily,
+    chunk by chunk, so a script of any size is never loaded into memory.
+    The number of bytes read so far is kept for the progress reporting.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        size: Optional[int] = None,
+        chunk_size: int = SCRIPT_CHUNK_SIZE,
+    ):
+        self.stream = stream
+        self.size = size
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+
+    @property
+    def progress(self) -> Optional[float]:
+        """
+        share of the script read so far, if the size of the script is known
+        """
+        if not self.size:
+            return None
+
+        return min(1.0, self.bytes_read / self.size)
+
+    def __iter__(self) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        splitter = StatementSplitter()
+
+        while 1:
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                break
+
+            self.bytes_read += len(chunk)
+            yield from splitter.feed(decoder.decode(chunk))
+
+        yield from splitter.feed(decoder.decode(b"", final=True))
+        statement = splitter.finish()
+        if statement is not None:
+            yield statement
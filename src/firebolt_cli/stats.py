@@ -0,0 +1,133 @@
+import hashlib
+import json
+import math
+from typing import Any, List, Optional, Sequence
+
+from firebolt_cli.output import is_numeric
+
+# number of bits of the hash used to choose a register of the HyperLogLog,
+# 2**12 registers give about 1.6% standard error of the distinct estimate
+HLL_PRECISION = 12
+HLL_HASH_BITS = 64
+
+STATS_HEADERS = ["column", "count", "nulls", "min", "max", "distinct", "mean"]
+
+
+class HyperLogLog:
+    """
+    Estimate the number of distinct values in constant memory,
+    a single byte register is kept for each of the 2**precision buckets
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(2 ** precision)
+        self._encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+
+    def add(self, value: Any) -> None:
+        digest = hashlib.blake2b(
+            self._encoder.encode(value).encode("utf-8"),
+            digest_size=HLL_HASH_BITS // 8,
+        ).digest()
+        hashed = int.from_bytes(digest, "big")
+
+        rest_bits = HLL_HASH_BITS - self.precision
+        idx = hashed >> rest_bits
+        rest = hashed & ((1 << rest_bits) - 1)
+        # position of the leftmost 1 bit in the rest of the hash
+        rank = rest_bits - rest.bit_length() + 1
+
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros > 0:
+            # linear counting is more accurate for small cardinalities
+            return round(m * math.log(m / zeros))
+
+        return round(raw)
+
+
+class ColumnStats:
+    """
+    Count, null count, min, max, distinct estimate and mean (for numbers)
+    of a column, updated value by value in constant memory
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.min: Any = None
+        self.max: Any = None
+        self.distinct = HyperLogLog()
+
+        self._numeric_count = 0
+        self._numeric_sum = 0.0
+
+    def update(self, column: Sequence) -> None:
+        for value in column:
+            self.count += 1
+            if value is None:
+                self.nulls += 1
+                continue
+
+            self.distinct.add(value)
+
+            if is_numeric(value):
+                self._numeric_count += 1
+                self._numeric_sum += float(value)
+
+            try:
+                if self.min is None or value < self.min:
+                    self.min = value
+                if self.max is None or value > self.max:
+                    self.max = value
+            except TypeError:
+                # values of different types in the same column cannot be ordered
+                pass
+
+    @property
+    def mean(self) -> Optional[float]:
+        # mean is only shown for the columns of numbers
+        if self._numeric_count == 0 or self._numeric_count != self.count - self.nulls:
+            return None
+
+        return self._numeric_sum / self._numeric_count
+
+    def row(self) -> List:
+        return [
+            self.name,
+            self.count,
+            self.nulls,
+            self.min,
+            self.max,
+            self.distinct.estimate(),
+            self.mean,
+        ]
+
+
+class ResultStats:
+    """
+    Statistics of each column of a result, updated batch by batch
+    """
+
+    def __init__(self, headers: Sequence[str]):
+        self.columns = [ColumnStats(header) for header in headers]
+        self.row_count = 0
+
+    def update(self, batch: Sequence[Sequence]) -> None:
+        if not batch:
+            return
+
+        self.row_count += len(batch)
+        for column_stats, column in zip(self.columns, zip(*batch)):
+            column_stats.update(column)
+
+    def rows(self) -> List[List]:
+        return [column_stats.row() for column_stats in self.columns]
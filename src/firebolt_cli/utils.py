@@ -1,24 +1,62 @@
+import hashlib
 import json
 import os
+import pickle
+import queue
 import sys
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from configparser import ConfigParser
+from contextlib import contextmanager
 from functools import wraps
-from typing import Callable, Dict, Optional, Sequence, Tuple, Type
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
 
 import keyring
 from appdirs import user_config_dir
 from click import Command, Context, Group, echo
 from firebolt.common import Settings
 from firebolt.common.exception import FireboltError
+from firebolt.db import Connection, Cursor
 from firebolt.model.engine import Engine
 from firebolt.service.manager import ResourceManager
-from httpx import HTTPStatusError
+from httpx import HTTPStatusError, TransportError
 from keyring.errors import KeyringError
 from tabulate import tabulate
 
+from firebolt_cli.output import JsonEncoder, render_json
+
 config_file = os.path.join(user_config_dir(), "firebolt.ini")
 config_section = "firebolt-cli"
 
+FETCH_BATCH_SIZE = 10000
+
+# batch sizes used, when the batch size is driven by a memory budget
+MIN_BATCH_SIZE = 1
+INITIAL_BATCH_SIZE = 100
+MAX_BATCH_SIZE = 1000000
+# number of rows of each batch used for the row size estimation
+ROW_SIZE_SAMPLE = 100
+# size of a result kept in memory, before it is moved to a temporary file
+SPILL_THRESHOLD = 64 * 1024 ** 2
+# number of rows of a result shown at once in the interactive session
+PREVIEW_ROWS = 100
+
+# size of the row hashes and of the result checksum
+CHECKSUM_SIZE = 16
+
 
 def construct_shortcuts(shortages: dict) -> Type[Group]:
     class AliasedGroup(Group):
@@ -40,12 +78,25 @@ def construct_shortcuts(shortages: dict) -> Type[Group]:
     return AliasedGroup
 
 
+def construct_default_command_group(default: str) -> Type[Group]:
+    class DefaultCommandGroup(Group):
+        def parse_args(self, ctx: Context, args: List[str]) -> List[str]:
+            # the default command is invoked,
+            # unless the arguments start with the name of another command
+            if not args or args[0] not in self.commands:
+                args = [default] + args
+
+            return Group.parse_args(self, ctx, args)
+
+    return DefaultCommandGroup
+
+
 def prepare_execution_result_line(
-    data: Sequence, header: Sequence, use_json: bool = False
+    data: Sequence, header: Sequence, use_json: bool = False, compact: bool = False
 ) -> str:
     """
     return the string representation of data in either json or tabular formats.
-    In case of json, the result is dict
+    In case of json, the result is dict, without indentation if compact is set
     In case of tabular, the result is table with headers in the first column
     """
 
@@ -53,29 +104,497 @@ def prepare_execution_result_line(
         raise ValueError("data and header have different length")
 
     if use_json:
-        return json.dumps(dict(zip(header, data)), indent=4)
+        return JsonEncoder(compact).encode(dict(zip(header, data)))
     else:
         return tabulate(list(zip(header, data)), tablefmt="grid")
 
 
 def prepare_execution_result_table(
-    data: Sequence[Sequence], header: Sequence, use_json: bool = False
+    data: Sequence[Sequence],
+    header: Sequence,
+    use_json: bool = False,
+    compact: bool = False,
 ) -> str:
     """
     return the string representation of data in either json or tabular formats
-    In case of json, the result is list of dicts
-    In case of tabular, the result is table with headers in the first row
+    In case of json, the result is list of dicts, without indentation if compact
+    In case of tabular, the result is table with headers in the first row,
+    the whole data is in memory, so it is laid out by tabulate
     """
     for d in data:
         if len(d) != len(header):
             raise ValueError("data and header have different length")
 
     if use_json:
-        return json.dumps([dict(zip(header, d)) for d in data], indent=4)
+        return "".join(render_json(header, [data], compact))
     else:
         return tabulate(data, headers=header, tablefmt="grid")
 
 
+def estimate_size(value: Any) -> int:
+    """
+    estimate the memory used by a fetched value, including nested arrays
+    """
+    if isinstance(value, list):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+
+    return sys.getsizeof(value)
+
+
+def estimate_batch_size(batch: Sequence[Sequence]) -> int:
+    """
+    estimate the memory used by a batch of rows from a sample of its rows
+    """
+    if len(batch) == 0:
+        return 0
+
+    sample = batch[:: max(1, len(batch) // ROW_SIZE_SAMPLE)]
+    return sum(estimate_size(row) for row in sample) * len(batch) // len(sample)
+
+
+class BatchSizer:
+    """
+    Choose the size of the next batch to fetch, so a batch fits into memory_budget.
+    The average row size is measured on a sample of rows of each fetched batch.
+    """
+
+    def __init__(self, memory_budget: int, max_batch_size: int = MAX_BATCH_SIZE):
+        self.memory_budget = memory_budget
+        self.max_batch_size = max_batch_size
+        self.batch_size = min(INITIAL_BATCH_SIZE, max_batch_size)
+
+        self._sampled_rows = 0
+        self._sampled_bytes = 0
+
+    def update(self, batch: Sequence[Sequence]) -> int:
+        """
+        Account the fetched batch and return the size of the next batch
+        """
+        if batch:
+            step = max(1, len(batch) // ROW_SIZE_SAMPLE)
+            for row in batch[::step]:
+                self._sampled_bytes += estimate_size(row)
+                self._sampled_rows += 1
+
+        if self._sampled_rows:
+            row_size = max(1, self._sampled_bytes // self._sampled_rows)
+            self.batch_size = max(
+                MIN_BATCH_SIZE,
+                min(self.max_batch_size, self.memory_budget // row_size),
+            )
+
+        return self.batch_size
+
+
+def fetch_batches(
+    cursor: Cursor,
+    batch_size: int = FETCH_BATCH_SIZE,
+    memory_budget: Optional[int] = None,
+) -> Iterator[List]:
+    """
+    fetch the current result set of the cursor in batches of at most batch_size rows,
+    so only one batch is kept in memory at a time.
+    If memory_budget is set, the batch size is adjusted to the measured row size,
+    to keep each batch within the budget, batch_size is the upper limit then
+    """
+    sizer = BatchSizer(memory_budget, batch_size) if memory_budget else None
+    size = sizer.batch_size if sizer else batch_size
+
+    while 1:
+        batch = cursor.fetchmany(size)
+        if batch:
+            yield batch
+
+        # fetchmany returns less rows than requested only if the result is exhausted
+        if len(batch) < size:
+            break
+
+        if sizer:
+            size = sizer.update(batch)
+
+
+def result_batches(
+    cursor: Cursor,
+    batch_size: Optional[int] = None,
+    memory_budget: Optional[int] = None,
+) -> Iterator[List]:
+    """
+    fetch the current result set of the cursor in batches of batch_size rows,
+    or of the size within memory_budget, if it is set
+    """
+    if memory_budget:
+        return fetch_batches(cursor, batch_size or MAX_BATCH_SIZE, memory_budget)
+
+    return fetch_batches(cursor, batch_size or FETCH_BATCH_SIZE)
+
+
+class ResultChecksum:
+    """
+    Count the rows of a result and compute its fingerprint batch by batch.
+    In the ordered mode the rows are hashed one after another into a single hash,
+    otherwise the hashes of the rows are summed up, so the fingerprint
+    doesn't depend on the order of the rows, but still counts duplicates.
+    """
+
+    def __init__(self, ordered: bool = False):
+        self.ordered = ordered
+        self.row_count = 0
+
+        self._encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+        self._ordered_hash = hashlib.blake2b(digest_size=CHECKSUM_SIZE)
+        self._hash_sum = 0
+
+    def update(self, batch: Sequence[Sequence]) -> None:
+        self.row_count += len(batch)
+
+        encoded = [self._encoder.encode(row).encode("utf-8") for row in batch]
+        if self.ordered:
+            self._ordered_hash.update(b"".join(row + b"\n" for row in encoded))
+        else:
+            self._hash_sum += sum(
+                int.from_bytes(
+                    hashlib.blake2b(row, digest_size=CHECKSUM_SIZE).digest(), "big"
+                )
+                for row in encoded
+            )
+
+    def hexdigest(self) -> str:
+        if self.ordered:
+            return self._ordered_hash.hexdigest()
+
+        return "{:0{}x}".format(
+            self._hash_sum % 2 ** (8 * CHECKSUM_SIZE), 2 * CHECKSUM_SIZE
+        )
+
+
+class SpillBuffer:
+    """
+    Hold the batches of a result in memory until their estimated size passes
+    memory_limit, then move all of them to a temporary file, so a result
+    of any size stays within a bounded amount of memory. The rows are read back
+    batch by batch.
+    """
+
+    def __init__(self, memory_limit: int = SPILL_THRESHOLD):
+        self.memory_limit = memory_limit
+        self.row_count = 0
+
+        self._memory_batches: List[Sequence[Sequence]] = []
+        self._memory_size = 0
+        # offset of each batch in the spill file
+        self._offsets: List[int] = []
+        self._file: Optional[IO[bytes]] = None
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    def append(self, batch: Sequence[Sequence]) -> None:
+        if not batch:
+            return
+
+        self.row_count += len(batch)
+
+        if self._file is not None:
+            self._dump(batch)
+            return
+
+        self._memory_batches.append(batch)
+        self._memory_size += estimate_batch_size(batch)
+        if self._memory_size > self.memory_limit:
+            self._spill()
+
+    def extend(self, batches: Iterable[Sequence[Sequence]]) -> None:
+        for batch in batches:
+            self.append(batch)
+
+    def _spill(self) -> None:
+        self._file = tempfile.TemporaryFile(prefix="firebolt-cli-")
+        for batch in self._memory_batches:
+            self._dump(batch)
+        self._memory_batches, self._memory_size = [], 0
+
+    def _dump(self, batch: Sequence[Sequence]) -> None:
+        assert self._file is not None
+        self._file.seek(0, os.SEEK_END)
+        self._offsets.append(self._file.tell())
+        pickle.dump(batch, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def batches(self) -> Iterator[Sequence[Sequence]]:
+        """
+        yield the batches one by one
+        """
+        if self._file is None:
+            yield from self._memory_batches
+            return
+
+        for offset in self._offsets:
+            self._file.seek(offset)
+            yield pickle.load(self._file)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._memory_batches, self._offsets = [], []
+        self.row_count = 0
+
+    def __enter__(self) -> "SpillBuffer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class PageFetcher:
+    """
+    Fetch the current result set of the cursor page by page, the next page
+    is fetched in a background thread, while the current one is being read.
+    The pages have to be closed before the cursor is used for anything else.
+    """
+
+    def __init__(self, cursor: Cursor, page_size: int = PREVIEW_ROWS):
+        self.page_size = page_size
+        self.row_count = 0
+        self.exhausted = False
+
+        self._cursor = cursor
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._next: Optional[Future] = self._executor.submit(
+            cursor.fetchmany, page_size
+        )
+
+    def next_page(self) -> List:
+        """
+        return the next page of rows, an empty list if the result is exhausted
+        """
+        if self._next is None:
+            return []
+
+        rows = self._next.result()
+        self.row_count += len(rows)
+
+        # fetchmany returns less rows than requested only if the result is exhausted
+        if len(rows) < self.page_size:
+            self.exhausted = True
+            self._next = None
+        else:
+            self._next = self._executor.submit(self._cursor.fetchmany, self.page_size)
+
+        return rows
+
+    def close(self) -> None:
+        # wait for the page being fetched, so the cursor is not used concurrently
+        self._executor.shutdown(wait=True)
+        self._next = None
+        self.exhausted = True
+
+    def __enter__(self) -> "PageFetcher":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Hand out up to size connections to the threads, a connection is used
+    by a single thread at a time. The connections are opened with connect
+    on demand, an already open connection could be provided to start with.
+    The connections opened by the pool are closed with it.
+    Each connection has a single cursor, which keeps the values of the SET
+    statements applied to the pool, as the sdk holds them in the cursor.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Connection],
+        size: int,
+        connection: Optional[Connection] = None,
+    ):
+        self.size = size
+
+        self._connect = connect
+        self._idle: "queue.Queue[Connection]" = queue.Queue()
+        self._opened: List[Connection] = []
+        self._count = 0
+        self._lock = threading.Lock()
+        self._init_cursors()
+
+        if connection is not None:
+            self._idle.put(connection)
+            self._count = 1
+
+    def _init_cursors(self) -> None:
+        # SET statements applied to the pool, the cursor of each connection
+        # and the number of the settings already run on it
+        self.settings: List[str] = []
+        self._cursors: Dict[int, Cursor] = {}
+        self._applied: Dict[int, int] = {}
+        # connections of the acquired cursors
+        self._cursor_connections: Dict[int, Connection] = {}
+
+    def acquire(self) -> Connection:
+        """
+        return an idle connection, open a new one if there is none and the pool
+        is not full, or wait for a connection to be released otherwise
+        """
+        with self._lock:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                if self._count >= self.size:
+                    new_connection = False
+                else:
+                    self._count += 1
+                    new_connection = True
+
+        if not new_connection:
+            return self._idle.get()
+
+        try:
+            connection = self._connect()
+        except BaseException:
+            with self._lock:
+                self._count -= 1
+            raise
+
+        with self._lock:
+            self._opened.append(connection)
+        return connection
+
+    def release(self, connection: Connection) -> None:
+        self._idle.put(connection)
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def acquire_cursor(self) -> Cursor:
+        """
+        acquire a connection and return its cursor, the settings, which were
+        applied since the cursor was used last time, are run on it first
+        """
+        connection = self.acquire()
+        try:
+            key = id(connection)
+            if key not in self._cursors:
+                self._cursors[key], self._applied[key] = connection.cursor(), 0
+
+            cursor = self._cursors[key]
+            for setting in self.settings[self._applied[key] :]:
+                cursor.execute(setting)
+                self._applied[key] += 1
+        except BaseException:
+            self.release(connection)
+            raise
+
+        self._cursor_connections[id(cursor)] = connection
+        return cursor
+
+    def release_cursor(self, cursor: Cursor) -> None:
+        self.release(self._cursor_connections.pop(id(cursor)))
+
+    @contextmanager
+    def cursor(self) -> Iterator[Cursor]:
+        cursor = self.acquire_cursor()
+        try:
+            yield cursor
+        finally:
+            self.release_cursor(cursor)
+
+    def apply_setting(self, statement: str) -> None:
+        """
+        Run the SET statement on a cursor, the engine validates it, and on each
+        of the other cursors before its next statement. No statements should run
+        on the pool meanwhile, the ones running would miss the setting
+        """
+        self.settings.append(statement)
+        try:
+            with self.cursor():
+                pass
+        except BaseException:
+            self.settings.pop()
+            raise
+
+    def _close_cursors(self) -> None:
+        for cursor in self._cursors.values():
+            cursor.close()
+        self._cursors, self._applied = {}, {}
+
+    def close(self) -> None:
+        self._close_cursors()
+
+        with self._lock:
+            opened, self._opened = self._opened, []
+
+        for connection in opened:
+            connection.close()
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class BalancedConnectionPool(ConnectionPool):
+    """
+    Spread the connections over the pools of several engines, a connection
+    is acquired from the engine with the least connections in use, that is
+    with the least outstanding statements. An engine, which fails to connect,
+    is skipped from then on. A statement, which fails on an engine, is not retried
+    on another one.
+    """
+
+    def __init__(self, pools: Sequence[Tuple[str, ConnectionPool]], size: int):
+        self.size = size
+
+        self._pools = dict(pools)
+        self._in_use = {name: 0 for name in self._pools}
+        self._engines: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._init_cursors()
+
+    def acquire(self) -> Connection:
+        while 1:
+            with self._lock:
+                if not self._in_use:
+                    raise FireboltError("None of the engines could be connected to")
+
+                name = min(self._in_use, key=self._in_use.__getitem__)
+                self._in_use[name] += 1
+
+            try:
+                connection = self._pools[name].acquire()
+            except (FireboltError, HTTPStatusError, TransportError) as err:
+                with self._lock:
+                    self._in_use.pop(name, None)
+                echo(f"Engine {name} is skipped, connection failed: {err}", err=True)
+                continue
+
+            with self._lock:
+                self._engines[id(connection)] = name
+            return connection
+
+    def release(self, connection: Connection) -> None:
+        with self._lock:
+            name = self._engines.pop(id(connection))
+            if name in self._in_use:
+                self._in_use[name] -= 1
+
+        self._pools[name].release(connection)
+
+    def close(self) -> None:
+        self._close_cursors()
+        for pool in self._pools.values():
+            pool.close()
+
+
 def construct_resource_manager(**raw_config_options: str) -> ResourceManager:
     """
     Propagate raw_config_options to the settings and construct a resource manager
@@ -134,6 +653,34 @@ def convert_bytes(num: Optional[float]) -> str:
     return format_output(num, x[::-1])
 
 
+def parse_bytes(size: str) -> int:
+    """
+    this function will convert a size like 512, 64KB or 1.5 GB to bytes,
+    the units are the same as in convert_bytes
+    """
+    size = size.strip().upper()
+    multiplier = 1
+
+    for power, unit in enumerate(["KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB"]):
+        if size.endswith(unit):
+            size = size[: -len(unit)]
+            multiplier = 1024 ** (power + 1)
+            break
+    else:
+        if size.endswith("B"):
+            size = size[:-1]
+
+    try:
+        num = float(size)
+    except ValueError:
+        raise ValueError(f"Invalid byte size: {size}")
+
+    if num < 0:
+        raise ValueError("Byte size cannot be negative")
+
+    return int(num * multiplier)
+
+
 def string_to_int_or_none(val: Optional[str]) -> Optional[int]:
     return int(val) if val else None
 
@@ -159,6 +706,17 @@ def read_from_stdin_buffer() -> Optional[str]:
     return sys.stdin.buffer.read().decode("utf-8") or None
 
 
+def stdin_buffer_has_data() -> bool:
+    """
+    check whether stdin file descriptor is open and has any data,
+    only the first byte is consumed, the rest is left unread
+    """
+    if sys.stdin.isatty():
+        return False
+
+    return bool(sys.stdin.buffer.read(1))
+
+
 def read_config() -> Dict[str, str]:
     """
     :return: dict with parameters from config file, or empty dict if no parameters found
@@ -1,5 +1,6 @@
 import unittest
 from collections import namedtuple
+from typing import Any, Callable
 
 import pytest
 from appdirs import user_config_dir
@@ -45,6 +46,47 @@ def cursor_mock(mocker: MockerFixture) -> unittest.mock.Mock:
     connection_mock.__exit__.assert_called_once()
 
 
+@pytest.fixture()
+def configure_connections(mocker: MockerFixture) -> Callable:
+    """
+    Patch connect to open a new connection mock on each call, and return
+    the patched connect. Each cursor of the connections calls
+    execute(cursor, statement, parameters), which sets the description
+    and the rows of the result on the cursor
+    """
+
+    def inner_configure_connections(execute: Callable) -> unittest.mock.Mock:
+        connections = []
+
+        def connect(**kwargs: Any) -> unittest.mock.Mock:
+            connection = unittest.mock.MagicMock()
+            connection.__enter__.return_value = connection
+            connection.engine_url = (
+                kwargs.get("engine_url") or f"{kwargs['engine_name']}.url"
+            )
+
+            def make_cursor() -> unittest.mock.Mock:
+                cursor = unittest.mock.MagicMock()
+                cursor.connection = connection
+                cursor.description = None
+                cursor.nextset.return_value = None
+                cursor.execute.side_effect = lambda statement, parameters=None: (
+                    execute(cursor, statement, parameters)
+                )
+                return cursor
+
+            connection.cursor.side_effect = make_cursor
+            connections.append(connection)
+            return connection
+
+        connect_mock = mocker.patch("firebolt_cli.query.connect", side_effect=connect)
+        # the opened connections, in the order of the calls
+        connect_mock.connections = connections
+        return connect_mock
+
+    return inner_configure_connections
+
+
 @pytest.fixture()
 def configure_resource_manager(mocker: MockerFixture) -> ResourceManager:
     """
@@ -0,0 +1,138 @@
+import asyncio
+from typing import List
+from unittest import mock
+
+import pytest
+from firebolt.common.exception import FireboltError
+
+from firebolt_cli.async_runner import AsyncStatementRunner
+
+
+class FakeCursor:
+    """
+    Async cursor, which returns the number at the end of the statement
+    after sleeping for the number of milliseconds at its start,
+    and keeps the SET statements like the sdk
+    """
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+        self.description = None
+        self.closed = False
+        self.settings: List[str] = []
+
+    async def execute(self, statement: str) -> None:
+        if statement.startswith("SET"):
+            self.settings.append(statement)
+            self.description = None
+            return
+
+        self.stats["executed"].append((statement, list(self.settings)))
+        delay, value = statement.split()
+        if value == "fail":
+            raise FireboltError("failed")
+
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(
+            self.stats["max_in_flight"], self.stats["in_flight"]
+        )
+        try:
+            await asyncio.sleep(int(delay) / 1000)
+        finally:
+            self.stats["in_flight"] -= 1
+
+        column = mock.Mock()
+        column.name = "value"
+        self.description = [column]
+        self._batches = [[[value]], []]
+
+    async def fetchmany(self, size: int) -> list:
+        return self._batches.pop(0)
+
+    async def nextset(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def make_runner(stats: dict, concurrency: int, timeout=None) -> AsyncStatementRunner:
+    async def connect() -> mock.Mock:
+        connection = mock.Mock()
+        connection.cursor.side_effect = lambda: FakeCursor(stats)
+        connection.aclose = mock.AsyncMock()
+        stats["connections"].append(connection)
+        return connection
+
+    return AsyncStatementRunner(connect, 2, concurrency, timeout=timeout)
+
+
+def new_stats() -> dict:
+    return {"in_flight": 0, "max_in_flight": 0, "connections": [], "executed": []}
+
+
+def test_async_statement_runner() -> None:
+    """
+    Many statements are in flight over two connections,
+    the results are passed on in the order of the statements
+    """
+    stats = new_stats()
+    results: List[str] = []
+
+    def on_result(number, statement_results, duration) -> None:
+        for description, buffer in statement_results:
+            results.extend(row[0] for batch in buffer.batches() for row in batch)
+
+    statements = [f"{50 - i} {i}" for i in range(20)]
+    make_runner(stats, concurrency=10).run(enumerate(statements), on_result)
+
+    assert results == [str(i) for i in range(20)]
+    assert stats["max_in_flight"] == 10
+    assert len(stats["connections"]) == 2
+    for connection in stats["connections"]:
+        connection.aclose.assert_awaited_once()
+
+
+def test_async_statement_runner_set() -> None:
+    """
+    A SET statement runs after the statements before it,
+    and reaches all the statements after it on every cursor
+    """
+    stats = new_stats()
+    on_result = mock.Mock()
+
+    statements = [f"{10 - i} {i}" for i in range(6)] + ["SET a = 1"]
+    statements += [f"{10 - i} {i}" for i in range(6, 12)]
+    make_runner(stats, concurrency=4).run(enumerate(statements), on_result)
+
+    assert [call.args[0] for call in on_result.call_args_list] == list(range(13))
+    assert on_result.call_args_list[6].args[1] == []
+    assert sorted(stats["executed"], key=lambda item: int(item[0].split()[1])) == [
+        (statement, ["SET a = 1"] if number > 6 else [])
+        for number, statement in enumerate(statements)
+        if number != 6
+    ]
+
+
+@pytest.mark.parametrize(
+    "statements,error",
+    [
+        (["1 a", "10000 b", "1 c"], "Statement 2 timed out after 0.1s"),
+        (["1 a", "0 fail", "10000 c"], "Statement 2 failed: failed"),
+    ],
+)
+def test_async_statement_runner_cancel(statements, error) -> None:
+    """
+    A statement is cancelled on timeout, the statements in flight
+    are cancelled once a statement fails
+    """
+    stats = new_stats()
+    on_result = mock.Mock()
+
+    with pytest.raises(FireboltError, match=error):
+        make_runner(stats, concurrency=3, timeout=0.1).run(
+            enumerate(statements, start=1), on_result
+        )
+
+    on_result.assert_called_once()
+    assert stats["in_flight"] == 0
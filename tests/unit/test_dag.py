@@ -0,0 +1,122 @@
+import pytest
+from firebolt.common.exception import FireboltError
+
+from firebolt_cli.dag import (
+    ScriptStatement,
+    critical_path,
+    statement_dependencies,
+)
+
+
+def dependencies(*texts: str) -> list:
+    return statement_dependencies(
+        [ScriptStatement(number, text) for number, text in enumerate(texts, start=1)]
+    )
+
+
+def test_script_statement_tables() -> None:
+    """
+    Table names are found outside of strings and comments,
+    unquoted names are case insensitive
+    """
+    statement = ScriptStatement(
+        1,
+        "-- FROM commented\nINSERT INTO Sales.Orders SELECT * FROM ext_orders o "
+        "JOIN \"Customers\" c ON o.id = c.id WHERE o.note = 'from notes'",
+    )
+    assert statement.writes == {"sales.orders"}
+    assert statement.reads == {"ext_orders", "Customers"}
+
+    statement = ScriptStatement(
+        1, "INSERT INTO a SELECT * FROM b WHERE note = 'it\\'s from c' OR x IN d"
+    )
+    assert statement.writes == {"a"}
+    assert statement.reads == {"b"}
+
+    statement = ScriptStatement(1, "CREATE FACT TABLE IF NOT EXISTS t (id INT)")
+    assert statement.writes == {"t"}
+    assert not statement.is_barrier
+    assert ScriptStatement(1, "SET x = 1").is_barrier
+
+
+def test_script_statement_table_list() -> None:
+    """
+    All the tables of a comma separated FROM list are read, a list with
+    something else than tables and subqueries could read anything
+    """
+    statement = ScriptStatement(
+        1, 'SELECT * FROM a, s."B" AS b, c x, (SELECT * FROM d) e WHERE a.id = 1'
+    )
+    assert statement.reads == {"a", "s.B", "c", "d"}
+    assert not statement.is_barrier
+
+    statement = ScriptStatement(1, "SELECT * FROM a ORDER BY x, y")
+    assert statement.reads == {"a"}
+    assert not statement.is_barrier
+
+    assert ScriptStatement(1, "SELECT * FROM a, 'b'").is_barrier
+
+
+def test_statement_dependencies_inferred() -> None:
+    """
+    A statement depends on the earlier ones, which write the tables it uses,
+    or read the tables it writes, and on the statements without known tables
+    """
+    assert (
+        dependencies(
+            "INSERT INTO b SELECT * FROM ext",
+            "SELECT * FROM a, b",
+            "SELECT * FROM a",
+        )
+        == [set(), {0}, set()]
+    )
+    assert (
+        dependencies(
+            "CREATE TABLE a (id INT)",
+            "CREATE TABLE b (id INT)",
+            "INSERT INTO a SELECT * FROM ext",
+            "INSERT INTO b SELECT * FROM a",
+            "DROP TABLE ext",
+            "SET x = 1",
+            "SELECT * FROM b",
+        )
+        == [set(), set(), {0}, {0, 1, 2}, {2}, {0, 1, 2, 3, 4}, {1, 3, 5}]
+    )
+
+
+def test_statement_dependencies_declared() -> None:
+    """
+    The declared dependencies replace the inferred ones
+    """
+    assert (
+        dependencies(
+            "-- @name first\nCREATE TABLE a (id INT)",
+            "/* @name second */ SET x = 1",
+            "-- @depends first, second\nSELECT * FROM b",
+            "-- @depends second\nSELECT * FROM a",
+        )
+        == [set(), {0}, {0, 1}, {1}]
+    )
+
+    # a SET statement is run after all the earlier statements
+    # and before all the later ones in any case
+    assert (
+        dependencies(
+            "-- @name first\nCREATE TABLE a (id INT)",
+            "SELECT * FROM a",
+            "-- @depends first\nSET x = 1",
+            "-- @depends first\nSELECT * FROM a",
+        )
+        == [set(), {0}, {0, 1}, {0, 2}]
+    )
+
+    with pytest.raises(FireboltError, match="Statement 2 depends on later"):
+        dependencies("SELECT 1", "-- @depends later\nSELECT 2", "-- @name later\nx")
+
+
+def test_critical_path() -> None:
+    assert critical_path([set(), set(), {0}, {0, 1}], [1.0, 5.0, 1.0, 2.0]) == (
+        [1, 3],
+        7.0,
+    )
+    assert critical_path([], []) == ([], 0.0)
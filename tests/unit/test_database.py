@@ -163,6 +163,33 @@ def test_databases_list_happy_path_json(
     )
 
 
+def test_databases_list_happy_path_ndjson(
+    configure_resource_manager: Sequence,
+) -> None:
+    """
+    Test common workflow with some databases and ndjson output
+    """
+    databases = [
+        Database("db_name1", "eu-east-1", ""),
+        Database("db_name2", "eu-west-1", ""),
+    ]
+
+    def ndjson_validator(output: str) -> None:
+        lines = output.strip().split("\n")
+        assert [json.loads(line)["name"] for line in lines] == [
+            "db_name1",
+            "db_name2",
+        ]
+
+    databases_list_generic_workflow(
+        configure_resource_manager=configure_resource_manager,
+        return_databases=databases,
+        additional_parameters=["--format", "ndjson"],
+        name_contains=None,
+        output_validator=ndjson_validator,
+    )
+
+
 def test_databases_list_happy_path_name_contains(
     configure_resource_manager: Sequence,
 ) -> None:
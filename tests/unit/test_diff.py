@@ -0,0 +1,56 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from firebolt_cli.diff import ResultDiff, diff_ordered, diff_unordered
+
+
+def test_diff_unordered() -> None:
+    """
+    The order of the rows and the batches doesn't matter,
+    duplicated rows are counted
+    """
+    left = [[[1, "a"], [2, "b"]], [[2, "b"], [3, Decimal("1.5")]]]
+    right = [[[3, Decimal("1.5")]], [[2, "b"], [1, "a"], [4, date(2022, 1, 1)]]]
+
+    diff = diff_unordered(left, right, partitions=3)
+
+    assert (diff.left_rows, diff.right_rows) == (4, 4)
+    assert not diff.equal
+    assert diff.only_left == [[2, "b"]]
+    assert diff.only_right == [[4, "2022-01-01"]]
+
+    assert diff_unordered(left, [left[1], left[0]], partitions=3).equal
+    assert diff_unordered([], [], partitions=3).equal
+
+
+def test_diff_ordered() -> None:
+    left = [[[1], [2]], [[3]]]
+
+    assert diff_ordered(left, [[[1]], [[2], [3]]]).equal
+
+    diff = diff_ordered(left, [[[1], [3], [2], [4]]])
+    assert (diff.left_rows, diff.right_rows) == (3, 4)
+    assert diff.only_left == [[2], [3]]
+    assert diff.only_right == [[3], [2], [4]]
+
+
+@pytest.mark.parametrize("compare", [diff_ordered, diff_unordered])
+def test_diff_limit(compare) -> None:
+    """
+    Only the limited number of rows is kept, but all of them are counted
+    """
+    diff = compare([[[i] for i in range(10)]], [], limit=3)
+
+    assert diff.only_left_count == 10
+    assert len(diff.only_left) == 3
+    assert diff.only_right_count == 0
+
+
+def test_result_diff_duplicates() -> None:
+    diff = ResultDiff(limit=2)
+    diff.add_only_right("[1]", count=5)
+
+    assert diff.only_right == [[1], [1]]
+    assert diff.only_right_count == 5
@@ -513,6 +513,63 @@ def test_engine_list(configure_resource_manager: Sequence, list_command: str) ->
     assert result.exit_code == 0
 
 
+def test_engine_list_ndjson(configure_resource_manager: Sequence) -> None:
+    """
+    test engine list with ndjson output, one json object per line
+    """
+    rm, _, _, engines_mock, _ = configure_resource_manager
+
+    engine_mock1 = mock.MagicMock()
+    engine_mock1.name = "engine_mock1"
+    engine_mock1.current_status_summary = (
+        EngineStatusSummary.ENGINE_STATUS_SUMMARY_RUNNING
+    )
+
+    engine_mock2 = mock.MagicMock()
+    engine_mock2.name = "engine_mock2"
+    engine_mock2.current_status_summary = None
+
+    engines_mock.get_many.return_value = [engine_mock1, engine_mock2]
+
+    result = CliRunner(mix_stderr=False).invoke(
+        main, "engine list --format ndjson".split()
+    )
+
+    lines = result.stdout.strip().split("\n")
+    assert len(lines) == 2
+    assert json.loads(lines[0])["name"] == "engine_mock1"
+    assert json.loads(lines[0])["status"] == "ENGINE_STATUS_SUMMARY_RUNNING"
+    assert json.loads(lines[1])["name"] == "engine_mock2"
+
+    rm.assert_called_once()
+    assert result.stderr == ""
+    assert result.exit_code == 0
+
+
+def test_engine_list_json_compact(configure_resource_manager: Sequence) -> None:
+    """
+    test engine list with json output without indentation
+    """
+    _, _, _, engines_mock, _ = configure_resource_manager
+
+    engine_mock = mock.MagicMock()
+    engine_mock.name = "engine_mock1"
+    engine_mock.current_status_summary = (
+        EngineStatusSummary.ENGINE_STATUS_SUMMARY_RUNNING
+    )
+    engines_mock.get_many.return_value = [engine_mock, engine_mock]
+
+    result = CliRunner(mix_stderr=False).invoke(
+        main, "engine list --json --compact".split()
+    )
+
+    assert result.stdout.count("\n") == 1
+    output = json.loads(result.stdout)
+    assert [engine["name"] for engine in output] == ["engine_mock1"] * 2
+    assert output[0]["status"] == "ENGINE_STATUS_SUMMARY_RUNNING"
+    assert result.exit_code == 0
+
+
 def generic_engine_update(configure_resource_manager: Sequence, parameters: str):
     """
     Test engine create standard workflow with all optional parameters
@@ -1,3 +1,4 @@
+import os
 import unittest
 from unittest import mock
 
@@ -7,8 +8,10 @@ from prompt_toolkit.application import create_app_session
 from prompt_toolkit.input import create_pipe_input
 from prompt_toolkit.output import DummyOutput
 
+from firebolt_cli.output import TABULAR_FORMAT
 from firebolt_cli.query import (
     INTERNAL_COMMANDS,
+    echo_via_pager_if_long,
     enter_interactive_session,
     process_internal_command,
 )
@@ -23,7 +26,7 @@ def test_interactive_immediate_stop() -> None:
     inp.send_text(".quit\n")
 
     with create_app_session(input=inp, output=DummyOutput()):
-        enter_interactive_session(cursor_mock, False)
+        enter_interactive_session(cursor_mock, TABULAR_FORMAT)
 
     inp.close()
     cursor_mock.execute.assert_not_called()
@@ -44,7 +47,7 @@ def test_interactive_send_empty() -> None:
     inp.send_text(".quit\n")
 
     with create_app_session(input=inp, output=DummyOutput()):
-        enter_interactive_session(cursor_mock, False)
+        enter_interactive_session(cursor_mock, TABULAR_FORMAT)
 
     cursor_mock.execute.assert_not_called()
     inp.close()
@@ -66,7 +69,7 @@ def test_interactive_multiple_requests() -> None:
     inp.send_text(".quit\n")
 
     with create_app_session(input=inp, output=DummyOutput()):
-        enter_interactive_session(cursor_mock, False)
+        enter_interactive_session(cursor_mock, TABULAR_FORMAT)
 
     cursor_mock.execute.assert_has_calls(
         [
@@ -97,7 +100,7 @@ def test_interactive_raise_error() -> None:
     inp.send_text(".quit\n")
 
     with create_app_session(input=inp, output=DummyOutput()):
-        enter_interactive_session(cursor_mock, False)
+        enter_interactive_session(cursor_mock, TABULAR_FORMAT)
 
     inp.close()
     cursor_mock.execute.assert_called_once_with("wrong sql")
@@ -145,9 +148,119 @@ def test_interactive_multi_statement() -> None:
     inp.send_text(".exit\n")
 
     with create_app_session(input=inp, output=DummyOutput()):
-        enter_interactive_session(cursor_mock, False)
+        enter_interactive_session(cursor_mock, TABULAR_FORMAT)
     inp.close()
 
     cursor_mock.execute.assert_called_once_with("SELECT 1; SELECT 2")
 
     assert cursor_mock.nextset.call_count == 2
+
+
+def test_interactive_summary(capsys) -> None:
+    """
+    .summary executes the query, and prints the statistics instead of the rows
+    """
+    cursor_mock = unittest.mock.MagicMock()
+    cursor_mock.nextset.return_value = None
+    header = unittest.mock.Mock()
+    header.name = "name"
+    cursor_mock.description = [header]
+    cursor_mock.fetchmany.side_effect = [[["row1"], ["row2"]], []]
+
+    inp = create_pipe_input()
+    inp.send_text(".summary SELECT 1;\n")
+    inp.send_text(".exit\n")
+
+    with create_app_session(input=inp, output=DummyOutput()):
+        enter_interactive_session(cursor_mock, TABULAR_FORMAT)
+    inp.close()
+
+    cursor_mock.execute.assert_called_once_with("SELECT 1")
+
+    output = capsys.readouterr().out
+    assert "distinct" in output
+    assert "row1" in output and "row2" in output
+
+
+def test_interactive_preview(capsys) -> None:
+    """
+    Only the first page of the result is printed, the next one on .more
+    """
+    cursor_mock = unittest.mock.MagicMock()
+    cursor_mock.nextset.return_value = None
+    header = unittest.mock.Mock()
+    header.name = "name"
+    cursor_mock.description = [header]
+    cursor_mock.fetchmany.side_effect = [[["row1"], ["row2"]], [["row3"]]]
+
+    inp = create_pipe_input()
+    inp.send_text("SELECT 1;\n")
+    inp.send_text(".more\n")
+    inp.send_text(".more\n")
+    inp.send_text(".exit\n")
+
+    with create_app_session(input=inp, output=DummyOutput()):
+        enter_interactive_session(cursor_mock, TABULAR_FORMAT, preview_rows=2)
+    inp.close()
+
+    cursor_mock.execute.assert_called_once_with("SELECT 1")
+    cursor_mock.fetchmany.assert_called_with(2)
+
+    output = capsys.readouterr().out
+    assert output.index("row2") < output.index(".more") < output.index("row3")
+    assert "No more rows" in output
+
+
+def test_echo_via_pager_if_long(capsys) -> None:
+    """
+    Only the text longer than the terminal goes to the pager,
+    the chunks are passed to the pager without rendering them all up front
+    """
+    rendered = []
+
+    def chunks(count: int):
+        for i in range(count):
+            rendered.append(i)
+            yield f"line{i}\n"
+
+    with mock.patch("firebolt_cli.query.echo_via_pager") as pager_mock, mock.patch(
+        "shutil.get_terminal_size", return_value=os.terminal_size((80, 11))
+    ):
+        echo_via_pager_if_long(chunks(10))
+        pager_mock.assert_not_called()
+        assert capsys.readouterr().out == "".join(f"line{i}\n" for i in range(10))
+
+        rendered.clear()
+        echo_via_pager_if_long(chunks(1000))
+        pager_mock.assert_called_once()
+        assert len(rendered) == 11
+
+        paged = pager_mock.call_args.args[0]
+        assert "".join(paged) == "".join(f"line{i}\n" for i in range(1000))
+
+
+def test_interactive_expanded(capsys) -> None:
+    """
+    .expanded switches between the tabular and the expanded output
+    """
+    cursor_mock = unittest.mock.MagicMock()
+    cursor_mock.nextset.return_value = None
+    header = unittest.mock.Mock()
+    header.name = "name"
+    cursor_mock.description = [header]
+    cursor_mock.fetchmany.side_effect = [[["row1"]], [["row2"]]]
+
+    inp = create_pipe_input()
+    inp.send_text(".expanded\n")
+    inp.send_text("SELECT 1;\n")
+    inp.send_text(".expanded\n")
+    inp.send_text("SELECT 2;\n")
+    inp.send_text(".exit\n")
+
+    with create_app_session(input=inp, output=DummyOutput()):
+        enter_interactive_session(cursor_mock, TABULAR_FORMAT)
+    inp.close()
+
+    output = capsys.readouterr().out
+    assert "-[ RECORD 1 ]-\nname | row1\n" in output
+    assert "| row2   |" in output
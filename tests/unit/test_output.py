@@ -0,0 +1,330 @@
+import csv
+import gzip
+import io
+import json
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+
+import pyarrow.ipc
+import pyarrow.parquet
+import pytest
+import zstandard
+from firebolt.db import ARRAY, DECIMAL
+from tabulate import tabulate
+
+from firebolt_cli.output import (
+    CsvEncoder,
+    JsonEncoder,
+    ShardWriter,
+    format_cell,
+    render_csv,
+    render_expanded,
+    render_grid,
+    render_json,
+    render_ndjson,
+    write_arrow_stream,
+    write_parquet,
+)
+
+Column = namedtuple("Column", "name type_code")
+
+
+def test_render_grid_tabulate_compatible() -> None:
+    """
+    Without truncation, the grid is the same as tabulate's grid format
+    """
+    headers = ["name", "value", "empty"]
+    data = [["first", 1, None], ["second row", 22, None], ["third", 333, None]]
+
+    assert "\n".join(render_grid(headers, [data[:1], data[1:]])) == tabulate(
+        data, headers=headers, tablefmt="grid"
+    )
+
+    assert "\n".join(render_grid(headers, [])) == tabulate(
+        [], headers=headers, tablefmt="grid"
+    )
+
+
+def test_render_grid_streaming() -> None:
+    """
+    Only the leading rows are used for the column widths,
+    wider cells of the following rows are truncated
+    """
+    chunks = render_grid(
+        ["name"],
+        [[["a"], ["bb"]], [["c" * 10]]],
+        sample_size=2,
+    )
+
+    assert next(chunks) == "+--------+\n| name   |\n+========+"
+    assert next(chunks) == "| a      |\n+--------+\n| bb     |\n+--------+"
+    assert next(chunks) == "| ccc... |\n+--------+"
+
+
+def test_render_grid_truncate() -> None:
+    """
+    Cells are truncated to the max cell width,
+    new lines are escaped to keep a row on a single line
+    """
+    output = "\n".join(
+        render_grid(["text"], [[["x" * 100], ["line1\nline2"]]], max_cell_width=10)
+    ).split("\n")
+
+    assert output[3] == "| xxxxxxx... |"
+    assert output[5] == "| line1\\n... |"
+    assert all(len(line) == len(output[0]) for line in output)
+
+
+def test_render_grid_max_width() -> None:
+    """
+    Only the columns, which fit into the max width, are rendered,
+    the first column is shrunk, if even it doesn't fit
+    """
+    headers = ["id", "name", "description"]
+    rows = [[1, "name", "x" * 100]]
+
+    output = list(render_grid(headers, [rows], max_width=20))
+    assert output[0].split("\n")[1] == "|   id | name   |"
+    assert output[-1].startswith("1 more columns don't fit")
+    assert all(len(line) <= 20 for line in "\n".join(output[:-1]).split("\n"))
+
+    output = list(render_grid(["description"], [[["x" * 100]]], max_width=10))
+    assert output[1] == "| xxx... |\n+--------+"
+
+    assert len(list(render_grid(headers, [rows], max_width=200))) == 2
+
+
+def test_format_cell_max_width() -> None:
+    """
+    Only the beginning of a long text is converted
+    """
+    assert format_cell("a\nb" * 1000, 4) == "a\\nba\\n"
+    assert format_cell("abc", 4) == "abc"
+    assert format_cell(12345, 2) == "12345"
+
+
+def test_render_expanded() -> None:
+    output = list(
+        render_expanded(
+            ["id", "description"], [[[1, "x" * 100]], [], [[2, None]]], max_width=20
+        )
+    )
+
+    assert output == [
+        "-[ RECORD 1 ]-\nid          | 1\ndescription | xxx...",
+        "-[ RECORD 2 ]-\nid          | 2\ndescription | ",
+    ]
+    assert list(render_expanded(["id"], [])) == ["(0 rows)"]
+    assert list(render_expanded(["id"], [[["x" * 100]]]))[0].endswith("x" * 100)
+
+
+def test_render_ndjson() -> None:
+    chunks = list(
+        render_ndjson(
+            ["id", "value"],
+            [[[1, Decimal("1.5")], [2, None]], [], [[3, date(2022, 1, 2)]]],
+        )
+    )
+
+    assert chunks == [
+        '{"id":1,"value":"1.5"}\n{"id":2,"value":null}',
+        '{"id":3,"value":"2022-01-02"}',
+    ]
+    assert json.loads(chunks[1]) == {"id": 3, "value": "2022-01-02"}
+
+
+@pytest.mark.parametrize("with_orjson", [True, False])
+@pytest.mark.parametrize("compact", [True, False])
+def test_render_json(mocker, with_orjson, compact) -> None:
+    """
+    The streamed json is the same as written by json.dumps,
+    with or without orjson, including floats and non-ascii text
+    """
+    if not with_orjson:
+        mocker.patch("firebolt_cli.output.import_orjson", return_value=None)
+
+    headers = ["id", "name", "tags", "price"]
+    rows = [
+        [1, "a", [], Decimal("1.5")],
+        [2 ** 64, 'b"\n', ["x", [1, {"y": None}]], None],
+        [None, "", [True], 0.5],
+        [3, "café ☕ 😀 \x7f", [6e-05, float("nan")], float("-inf")],
+        [4, "ünïcode", ["ß", 1e-07], None],
+        [5, "ünïcode \u2028 😀", ["ß"], None],
+    ]
+    data = [dict(zip(headers, row)) for row in rows]
+    kwargs = {"separators": (",", ":")} if compact else {"indent": 4}
+    expected = json.dumps(data, default=str, **kwargs)
+
+    # the batches are encoded at once, the ones without floats by orjson
+    batches = [rows[:1], [], rows[1:5], rows[5:]]
+    assert "".join(render_json(headers, batches, compact, str)) == expected
+    assert "".join(render_json(headers, [], compact)) == json.dumps([], **kwargs)
+    assert JsonEncoder(compact, str).encode(data[1]) == json.dumps(
+        data[1], default=str, **kwargs
+    )
+
+
+def test_write_parquet(tmp_path) -> None:
+    """
+    Each batch is written as a separate row group with arrow types
+    derived from the cursor description
+    """
+    description = [
+        Column("id", int),
+        Column("name", str),
+        Column("price", DECIMAL(10, 2)),
+        Column("created", datetime),
+        Column("tags", ARRAY(str)),
+    ]
+    batches = [
+        [
+            [1, "a", Decimal("1.50"), datetime(2022, 1, 1), ["x"]],
+            [2, None, None, None, []],
+        ],
+        [[3, "c", Decimal("3.00"), datetime(2022, 1, 3, 12), ["y", "z"]]],
+    ]
+
+    path = str(tmp_path / "result.parquet")
+    write_parquet(path, description, batches)
+
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.schema_arrow.field("price").type == pyarrow.decimal128(10, 2)
+    assert parquet_file.schema_arrow.field("tags").type == pyarrow.list_(
+        pyarrow.string()
+    )
+
+    table = parquet_file.read()
+    assert table.column("id").to_pylist() == [1, 2, 3]
+    assert table.column("name").to_pylist() == ["a", None, "c"]
+    assert table.column("tags").to_pylist() == [["x"], [], ["y", "z"]]
+
+
+def test_write_arrow_stream() -> None:
+    """
+    Each batch is written as a separate record batch of the arrow IPC stream
+    """
+    description = [Column("id", int), Column("value", float)]
+    stream = io.BytesIO()
+    write_arrow_stream(stream, description, [[[1, 0.5], [2, None]], [], [[3, 1.5]]])
+
+    reader = pyarrow.ipc.open_stream(stream.getvalue())
+    batches = list(reader)
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert reader.schema.field("id").type == pyarrow.int64()
+    assert pyarrow.Table.from_batches(batches).column("value").to_pylist() == [
+        0.5,
+        None,
+        1.5,
+    ]
+
+
+def test_render_csv() -> None:
+    data = [["a,b", 1], ['c"d', None]]
+    expected = io.StringIO()
+    writer = csv.writer(expected)
+    writer.writerow(["name", "value"])
+    writer.writerows(data)
+
+    assert "".join(render_csv(["name", "value"], [data[:1], [], data[1:]])) == (
+        expected.getvalue()
+    )
+
+
+def test_csv_encoder() -> None:
+    """
+    The encoded batches are the same as written by csv.writer
+    """
+    description = [
+        Column("id", int),
+        Column("value", float),
+        Column("price", DECIMAL(10, 2)),
+        Column("flag", bool),
+        Column("day", date),
+        Column("created", datetime),
+        Column("name", str),
+        Column("tags", ARRAY(str)),
+    ]
+    batch = [
+        [
+            1,
+            0.1,
+            Decimal("1.50"),
+            True,
+            date(2022, 1, 2),
+            datetime(2022, 1, 1),
+            "a",
+            [],
+        ],
+        [None, None, None, None, None, None, None, None],
+        [-2, 1e16, Decimal("1E+2"), False, None, None, 'b,"c"\n', ["x", "y"]],
+        [2 ** 64, 1.0, None, None, None, None, "", ['"']],
+    ]
+    expected = io.StringIO()
+    csv.writer(expected).writerows(batch)
+
+    encoder = CsvEncoder(description)
+    assert encoder.encode(batch) == expected.getvalue()
+    assert encoder.encode(batch[:3]) + encoder.encode(batch[3:]) == (
+        expected.getvalue()
+    )
+    assert encoder.encode([]) == ""
+
+
+def test_csv_encoder_single_column() -> None:
+    """
+    Empty fields of a single column are quoted, as csv.writer does
+    """
+    expected = io.StringIO()
+    csv.writer(expected).writerows([["a"], [""], [None]])
+
+    assert CsvEncoder([Column("name", str)]).encode([["a"], [""], [None]]) == (
+        expected.getvalue()
+    )
+    assert CsvEncoder([]).encode([[], []]) == "\r\n\r\n"
+
+
+@pytest.mark.parametrize(
+    "compression,decompress",
+    [
+        (None, lambda x: x),
+        ("gzip", gzip.decompress),
+        ("zstd", lambda x: zstandard.ZstdDecompressor().decompressobj().decompress(x)),
+    ],
+)
+def test_shard_writer(tmp_path, compression, decompress) -> None:
+    """
+    A file is closed once it passes the max file size, the header is repeated
+    in each file, and the files are listed with row counts in the manifest
+    """
+    writer = ShardWriter(str(tmp_path), ".csv", compression, max_file_size=10)
+
+    writer.start_result_set("h\n")
+    for i in range(3):
+        writer.write("row{}\n".format(i) * 5, 5)
+    writer.start_result_set("h2\n")
+    writer.write("last\n", 1)
+    writer.write_manifest(format="csv")
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest["rows"] == 16
+    assert manifest["compression"] == compression
+    assert [(f["rows"], f["result_set"]) for f in manifest["files"]] == [
+        (5, 0),
+        (5, 0),
+        (5, 0),
+        (1, 1),
+    ]
+
+    contents = [
+        decompress((tmp_path / f["file"]).read_bytes()).decode()
+        for f in manifest["files"]
+    ]
+    assert contents[0] == "h\n" + "row0\n" * 5
+    assert contents[2] == "h\n" + "row2\n" * 5
+    assert contents[3] == "h2\nlast\n"
+    assert all(
+        (tmp_path / f["file"]).stat().st_size == f["bytes"] for f in manifest["files"]
+    )
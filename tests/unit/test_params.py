@@ -0,0 +1,55 @@
+import pytest
+from firebolt.common.exception import FireboltError
+
+from firebolt_cli.params import ParameterFile, parse_csv_value
+
+
+def test_parse_csv_value() -> None:
+    """
+    Values are text, unless a type is declared, so they are bound as written
+    """
+    assert parse_csv_value("12") == "12"
+    assert parse_csv_value("1.10") == "1.10"
+    assert parse_csv_value("007") == "007"
+    assert parse_csv_value("") is None
+    assert parse_csv_value("", int) is None
+    assert parse_csv_value("a, b") == "a, b"
+    assert parse_csv_value("12", int) == 12
+    assert parse_csv_value("-1.5e3", float) == -1500.0
+
+
+def test_parameter_file_csv(tmp_path) -> None:
+    path = tmp_path / "params.csv"
+    path.write_text('id:int,name,price:float,code:text\n1,"a, b",1.5,007\n2,,,\n')
+
+    with ParameterFile(str(path)) as parameters:
+        assert parameters.names == ["id", "name", "price", "code"]
+        assert list(parameters) == [[1, "a, b", 1.5, "007"], [2, None, None, None]]
+
+    path.write_text("id:int,a:b\nx,1\n")
+    with ParameterFile(str(path)) as parameters:
+        assert parameters.names == ["id", "a:b"]
+        with pytest.raises(FireboltError, match="Line 2 of .*'x'"):
+            list(parameters)
+
+    path.write_text("id,name\n1\n")
+    with ParameterFile(str(path)) as parameters:
+        with pytest.raises(FireboltError, match="Line 2"):
+            list(parameters)
+
+
+def test_parameter_file_ndjson(tmp_path) -> None:
+    """
+    Values are ordered by the keys of the first object, missing ones are null
+    """
+    path = tmp_path / "params.ndjson"
+    path.write_text('{"id": 1, "tags": ["x"]}\n\n{"tags": null, "id": 2}\n{"id": 3}\n')
+
+    with ParameterFile(str(path)) as parameters:
+        assert parameters.names == ["id", "tags"]
+        assert list(parameters) == [[1, ["x"]], [2, None], [3, None]]
+
+    path.write_text('{"id": 1}\n{"id": 2, "other": 3}\n')
+    with ParameterFile(str(path)) as parameters:
+        with pytest.raises(FireboltError, match="other"):
+            list(parameters)
@@ -1,15 +1,25 @@
 import csv
+import gzip
+import io
+import json
+import os
+import time
 import unittest.mock
 from collections import namedtuple
-from typing import Callable, Optional, Sequence
+from typing import Callable, Dict, List, Optional, Sequence
 from unittest import mock
 
+import pyarrow.ipc
+import pytest
 from click.testing import CliRunner
 from firebolt.common.exception import FireboltError
+from firebolt.service.types import EngineStatusSummary
 from pyfakefs.fake_filesystem import FakeFilesystem
 from pytest_mock import MockerFixture
 
-from firebolt_cli.query import query
+from firebolt_cli.async_runner import AsyncStatementRunner
+from firebolt_cli.query import query, query_group
+from firebolt_cli.utils import FETCH_BATCH_SIZE, ResultChecksum
 
 
 def test_query_stdin_file_ambiguity(
@@ -64,6 +74,7 @@ def query_generic_test(
     expected_sql: str,
     input: Optional[str],
     cursor_mock: unittest.mock.Mock,
+    check_output_bytes_callback: Optional[Callable[[bytes], None]] = None,
 ) -> None:
     """
     test sql execution, either sql read from input or from parameters
@@ -75,6 +86,7 @@ def query_generic_test(
         ["test2", "test3"],
         ["data1", "data2"],
     ]
+    cursor_mock.fetchmany.return_value = cursor_mock.fetchall.return_value
 
     headers = [mock.Mock(), mock.Mock()]
     for header_mock, header_name in zip(headers, ["name1", "name2"]):
@@ -95,6 +107,9 @@ def query_generic_test(
     if check_output_callback:
         check_output_callback(result.stdout)
 
+    if check_output_bytes_callback:
+        check_output_bytes_callback(result.stdout_bytes)
+
     cursor_mock.execute.assert_called_once_with(expected_sql)
 
     assert result.exit_code == 0
@@ -123,6 +138,93 @@ def test_query_csv_output(
     )
 
 
+def test_query_csv_output_batches(
+    cursor_mock: unittest.mock.Mock, configure_cli: Callable
+) -> None:
+    """
+    csv output is written batch by batch with fetchmany,
+    and is the same as writing all rows at once
+    """
+    configure_cli()
+
+    data = [["test", "test1"], ["test,2", 'test"3'], ["data1", None]]
+    data += [[f"row{i}", i] for i in range(FETCH_BATCH_SIZE)]
+    cursor_mock.nextset.return_value = None
+    cursor_mock.fetchmany.side_effect = [
+        data[:FETCH_BATCH_SIZE],
+        data[FETCH_BATCH_SIZE:],
+    ]
+
+    headers = [mock.Mock(), mock.Mock()]
+    for header_mock, header_name in zip(headers, ["name1", "name2"]):
+        header_mock.name = header_name
+    cursor_mock.description = headers
+
+    result = CliRunner().invoke(
+        query,
+        ["--csv", "--engine-name", "engine-name"],
+        input="SELECT 1;",
+    )
+    assert result.exit_code == 0
+
+    expected = io.StringIO()
+    writer = csv.writer(expected)
+    writer.writerow(["name1", "name2"])
+    writer.writerows(data)
+
+    assert result.stdout_bytes == expected.getvalue().encode()
+    cursor_mock.fetchall.assert_not_called()
+    assert cursor_mock.fetchmany.call_count == 2
+
+
+def test_query_ndjson_output(
+    cursor_mock: unittest.mock.Mock, configure_cli: Callable
+) -> None:
+    """
+    test sql execution with --format ndjson, each row is a json object on a line
+    """
+    configure_cli()
+
+    def check_ndjson_correctness(output: str) -> None:
+        lines = output.strip().split("\n")
+        assert len(lines) == 3
+        assert json.loads(lines[0]) == {"name1": "test", "name2": "test1"}
+        assert all(" " not in line for line in lines)
+
+    query_generic_test(
+        ["--format", "ndjson", "--engine-name", "engine-name"],
+        check_ndjson_correctness,
+        expected_sql="query from input;",
+        input="query from input;",
+        cursor_mock=cursor_mock,
+    )
+
+
+@pytest.mark.parametrize("options", [["--json"], ["--format", "json", "--compact"]])
+def test_query_json_output(
+    cursor_mock: unittest.mock.Mock, configure_cli: Callable, options: Sequence[str]
+) -> None:
+    """
+    test sql execution with json output, the result is an array of objects
+    """
+    configure_cli()
+
+    def check_json(output: str) -> None:
+        assert json.loads(output) == [
+            {"name1": "test", "name2": "test1"},
+            {"name1": "test2", "name2": "test3"},
+            {"name1": "data1", "name2": "data2"},
+        ]
+
+    query_generic_test(
+        list(options) + ["--engine-name", "engine-name"],
+        check_json,
+        expected_sql="SELECT 1;",
+        input="SELECT 1;",
+        cursor_mock=cursor_mock,
+    )
+
+
 def test_query_tabular_output(
     cursor_mock: unittest.mock.Mock, configure_cli: Callable
 ) -> None:
@@ -232,7 +334,7 @@ def test_sql_execution_multiline(
 
     cursor_mock.nextset.side_effect = [True, None]
 
-    cursor_mock.fetchall.return_value = [
+    cursor_mock.fetchmany.return_value = [
         ["test", "test1"],
         ["test2", "test3"],
         ["data1", "data2"],
@@ -253,7 +355,7 @@ def test_sql_execution_multiline(
     assert result.exit_code == 0
 
     assert cursor_mock.nextset.call_count == 2
-    assert cursor_mock.fetchall.call_count == 2
+    assert cursor_mock.fetchmany.call_count == 2
 
     cursor_mock.execute.assert_called_once_with(expected_sql)
 
@@ -287,3 +389,847 @@ def test_query_default_engine(
 
     construct_resource_manager_mock.assert_called_once()
     default_database_engine_mock.assert_called_once()
+
+
+def test_query_raw_output(
+    mocker: MockerFixture, cursor_mock: unittest.mock.Mock, configure_cli: Callable
+) -> None:
+    """
+    With --raw the response body is streamed to stdout as is,
+    the cursor is not used for the query execution
+    """
+    configure_cli()
+
+    client_mock = mocker.patch("firebolt_cli.query.Client")
+    client = client_mock.return_value.__enter__.return_value
+    response = client.stream.return_value.__enter__.return_value
+    response.is_error = False
+    response.iter_bytes.return_value = [b"name1\tname2\n", b"test\t1\n"]
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--raw", "--engine-name", "engine-name"],
+        input="SELECT 1;",
+    )
+
+    assert result.exit_code == 0
+    assert result.stdout_bytes == b"name1\tname2\ntest\t1\n"
+    cursor_mock.execute.assert_not_called()
+
+    assert client.stream.call_args.kwargs["content"] == "SELECT 1;"
+    assert (
+        client.stream.call_args.kwargs["params"]["output_format"]
+        == "TabSeparatedWithNames"
+    )
+
+
+def test_query_raw_interactive(configure_cli: Callable) -> None:
+    """
+    Raw output is not available in the interactive mode
+    """
+    configure_cli()
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--raw", "--engine-name", "engine-name"],
+    )
+
+    assert result.exit_code != 0
+    assert "Raw output" in result.stderr
+
+
+def test_query_parquet_output_missing(configure_cli: Callable) -> None:
+    """
+    Parquet output requires an output file
+    """
+    configure_cli()
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--format", "parquet", "--engine-name", "engine-name"],
+        input="SELECT 1;",
+    )
+
+    assert result.exit_code != 0
+    assert "--output is required" in result.stderr
+
+
+def test_query_parquet_output(
+    mocker: MockerFixture, cursor_mock: unittest.mock.Mock, configure_cli: Callable
+) -> None:
+    """
+    Parquet output is written batch by batch with row group size batches
+    """
+    configure_cli()
+
+    write_parquet_mock = mocker.patch("firebolt_cli.query.write_parquet")
+    cursor_mock.nextset.return_value = None
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        [
+            "--format",
+            "parquet",
+            "--output",
+            "result.parquet",
+            "--row-group-size",
+            "1000",
+            "--engine-name",
+            "engine-name",
+        ],
+        input="SELECT 1;",
+    )
+
+    assert result.exit_code == 0
+    write_parquet_mock.assert_called_once()
+    assert write_parquet_mock.call_args.args[0] == "result.parquet"
+
+    cursor_mock.fetchmany.return_value = []
+    list(write_parquet_mock.call_args.args[2])
+    cursor_mock.fetchmany.assert_called_once_with(1000)
+
+
+def test_query_parquet_multiple_result_sets(
+    mocker: MockerFixture, cursor_mock: unittest.mock.Mock, configure_cli: Callable
+) -> None:
+    """
+    A single parquet file could hold only a single result set
+    """
+    configure_cli()
+
+    mocker.patch("firebolt_cli.query.write_parquet")
+    cursor_mock.nextset.side_effect = [True, None]
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--format", "parquet", "--output", "result.parquet"]
+        + ["--engine-name", "engine-name"],
+        input="SELECT 1; SELECT 2;",
+    )
+
+    assert result.exit_code != 0
+    assert "single result set" in result.stderr
+
+
+def test_query_arrow_output(
+    cursor_mock: unittest.mock.Mock, configure_cli: Callable
+) -> None:
+    """
+    Arrow output is an arrow IPC stream written to stdout
+    """
+    configure_cli()
+
+    def check_arrow_correctness(output: bytes) -> None:
+        table = pyarrow.ipc.open_stream(output).read_all()
+        assert table.column_names == ["name1", "name2"]
+        assert table.column("name1").to_pylist() == ["test", "test2", "data1"]
+
+    query_generic_test(
+        ["--format", "arrow", "--engine-name", "engine-name"],
+        None,
+        expected_sql="SELECT 1;",
+        input="SELECT 1;",
+        cursor_mock=cursor_mock,
+        check_output_bytes_callback=check_arrow_correctness,
+    )
+
+
+def test_query_output_dir(
+    fs: FakeFilesystem, cursor_mock: unittest.mock.Mock, configure_cli: Callable
+) -> None:
+    """
+    With --output-dir the result is written to compressed csv files
+    together with the manifest
+    """
+    configure_cli()
+
+    query_generic_test(
+        ["--output-dir", "result", "--compress", "gzip", "--max-file-size", "1MB"]
+        + ["--engine-name", "engine-name"],
+        lambda output: None,
+        expected_sql="SELECT 1;",
+        input="SELECT 1;",
+        cursor_mock=cursor_mock,
+    )
+
+    with open("result/manifest.json") as f:
+        manifest = json.load(f)
+
+    assert manifest["format"] == "csv"
+    assert manifest["rows"] == 3
+    assert manifest["files"][0]["file"] == "part-00000.csv.gz"
+
+    with gzip.open("result/part-00000.csv.gz", "rt") as f:
+        assert list(csv.reader(f)) == [
+            ["name1", "name2"],
+            ["test", "test1"],
+            ["test2", "test3"],
+            ["data1", "data2"],
+        ]
+
+
+def test_query_compress_without_output_dir(configure_cli: Callable) -> None:
+    configure_cli()
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--compress", "gzip", "--engine-name", "engine-name"],
+        input="SELECT 1;",
+    )
+
+    assert result.exit_code != 0
+    assert "--output-dir" in result.stderr
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+def test_query_checksum(
+    cursor_mock: unittest.mock.Mock, configure_cli: Callable, ordered: bool
+) -> None:
+    """
+    Only the row count and the checksum of the result are printed
+    """
+    configure_cli()
+
+    checksum = ResultChecksum(ordered)
+    checksum.update([["test", "test1"], ["test2", "test3"], ["data1", "data2"]])
+
+    def check_checksum(output: str) -> None:
+        assert output.strip() == f"Rows: 3, checksum: {checksum.hexdigest()}"
+
+    query_generic_test(
+        ["--checksum", "--engine-name", "engine-name"]
+        + (["--ordered"] if ordered else []),
+        check_checksum,
+        expected_sql="SELECT 1;",
+        input="SELECT 1;",
+        cursor_mock=cursor_mock,
+    )
+
+
+def test_query_checksum_options(configure_cli: Callable) -> None:
+    configure_cli()
+
+    for options in [["--checksum", "--csv"], ["--ordered"]]:
+        result = CliRunner(mix_stderr=False).invoke(
+            query,
+            options + ["--engine-name", "engine-name"],
+            input="SELECT 1;",
+        )
+
+        assert result.exit_code != 0
+        assert "--checksum" in result.stderr
+
+
+def test_query_diff(mocker: MockerFixture, configure_cli: Callable) -> None:
+    """
+    The same query runs on two engines,
+    the rows found only on one side are printed
+    """
+    configure_cli()
+
+    cursors = []
+    connections = []
+    for rows in [[["a", 1], ["b", 2]], [["b", 2], ["c", 3]]]:
+        cursor = mock.MagicMock()
+        header = mock.Mock()
+        header.name = "name"
+        cursor.description = [header, header]
+        cursor.fetchmany.side_effect = [rows, []]
+        cursors.append(cursor)
+
+        connection = mock.MagicMock()
+        connection.__enter__.return_value = connection
+        connection.cursor.return_value = cursor
+        connections.append(connection)
+
+    connect_mock = mocker.patch("firebolt_cli.query.connect", side_effect=connections)
+
+    result = CliRunner().invoke(
+        query_group,
+        ["diff", "--left-engine", "engine1", "--right-engine", "engine2"],
+        input="SELECT 1;",
+    )
+
+    assert result.exit_code == 1
+    assert [c.kwargs["engine_name"] for c in connect_mock.call_args_list] == [
+        "engine1",
+        "engine2",
+    ]
+    for cursor in cursors:
+        cursor.execute.assert_called_once_with("SELECT 1;")
+
+    assert "Rows only in left: 1" in result.stdout
+    assert "Rows only in right: 1" in result.stdout
+    assert "| a      |" in result.stdout
+    assert "| c      |" in result.stdout
+
+
+def test_query_diff_different_columns(
+    mocker: MockerFixture, configure_cli: Callable
+) -> None:
+    """
+    The results are not compared, if the queries return different columns
+    """
+    configure_cli()
+
+    connections = []
+    for names in [["name", "value"], ["name"]]:
+        cursor = mock.MagicMock()
+        cursor.description = []
+        for name in names:
+            header = mock.Mock()
+            header.name = name
+            cursor.description.append(header)
+
+        connection = mock.MagicMock()
+        connection.__enter__.return_value = connection
+        connection.cursor.return_value = cursor
+        connections.append(connection)
+
+    mocker.patch("firebolt_cli.query.connect", side_effect=connections)
+    for path in ["left.sql", "right.sql"]:
+        with open(path, "w") as file:
+            file.write("SELECT 1;")
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query_group,
+        [
+            "diff",
+            "--left-engine",
+            "engine-name",
+            "--left-file",
+            "left.sql",
+            "--right-file",
+            "right.sql",
+        ],
+    )
+
+    assert result.exit_code != 0
+    assert "returns columns name, value" in result.stderr
+    assert "Left rows" not in result.stdout
+    for connection in connections:
+        connection.cursor.return_value.fetchmany.assert_not_called()
+
+
+def test_query_group_default(
+    cursor_mock: unittest.mock.Mock, configure_cli: Callable
+) -> None:
+    """
+    query command is run, unless another command is specified
+    """
+    configure_cli()
+    cursor_mock.nextset.return_value = None
+
+    result = CliRunner().invoke(
+        query_group, ["--engine-name", "engine-name"], input="SELECT 1;"
+    )
+
+    assert result.exit_code == 0
+    cursor_mock.execute.assert_called_once_with("SELECT 1;")
+
+
+def test_query_stats_only(
+    cursor_mock: unittest.mock.Mock, configure_cli: Callable
+) -> None:
+    """
+    Only the statistics of each column are printed instead of the rows
+    """
+    configure_cli()
+
+    def check_stats(output: str) -> None:
+        stats = [json.loads(line) for line in output.splitlines()]
+
+        assert [s["column"] for s in stats] == ["name1", "name2"]
+        assert stats[0]["count"] == 3
+        assert stats[0]["nulls"] == 0
+        assert (stats[0]["min"], stats[0]["max"]) == ("data1", "test2")
+        assert stats[0]["distinct"] == 3
+        assert stats[0]["mean"] is None
+
+    query_generic_test(
+        ["--stats-only", "--format", "ndjson", "--engine-name", "engine-name"],
+        check_stats,
+        expected_sql="SELECT 1;",
+        input="SELECT 1;",
+        cursor_mock=cursor_mock,
+    )
+
+
+def test_query_stats_only_options(configure_cli: Callable) -> None:
+    configure_cli()
+
+    for options in [["--stats-only", "--checksum"], ["--stats-only", "--raw"]]:
+        result = CliRunner(mix_stderr=False).invoke(
+            query,
+            options + ["--engine-name", "engine-name"],
+            input="SELECT 1;",
+        )
+
+        assert result.exit_code != 0
+        assert "--stats-only" in result.stderr
+
+
+def test_query_script(cursor_mock: unittest.mock.Mock, configure_cli: Callable) -> None:
+    """
+    With --script, the statements are executed one by one
+    """
+    configure_cli()
+    cursor_mock.description = None
+    cursor_mock.nextset.return_value = None
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--engine-name", "engine-name", "--script"],
+        input="SELECT ';';\n-- comment\nSELECT 2;\n",
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert [c.args[0] for c in cursor_mock.execute.call_args_list] == [
+        "SELECT ';'",
+        "-- comment\nSELECT 2",
+    ]
+    assert "Statement 2 done in" in result.stderr
+
+
+def test_query_script_failed(
+    cursor_mock: unittest.mock.Mock, configure_cli: Callable
+) -> None:
+    """
+    A failed statement stops the script
+    """
+    configure_cli()
+    cursor_mock.description = None
+    cursor_mock.nextset.return_value = None
+
+    cursor_mock.execute.side_effect = [None, FireboltError("wrong")]
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--engine-name", "engine-name", "--script"],
+        input="SELECT 1; SELECT 2; SELECT 3;",
+    )
+    assert result.exit_code != 0
+    assert "Statement 2 failed: wrong" in result.stderr
+    assert cursor_mock.execute.call_count == 2
+
+
+def test_query_script_parallel(
+    configure_cli: Callable, configure_connections: Callable
+) -> None:
+    """
+    With --parallel, the statements run on a pool of connections to the same
+    engine, the results are printed in the order of the statements
+    """
+    configure_cli()
+    column = mock.Mock()
+    column.name = "value"
+
+    def execute(cursor: mock.Mock, statement: str, parameters: Sequence) -> None:
+        value = int(statement.split()[-1])
+        # the first statements finish last
+        time.sleep(0.05 * (5 - value))
+        cursor.description = [column]
+        cursor.fetchmany.side_effect = [[[value]], []]
+
+    connect_mock = configure_connections(execute)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--engine-name", "engine-name", "--parallel", "3", "--format", "ndjson"],
+        input="SELECT 1; SELECT 2; SELECT 3; SELECT 4;",
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout == "".join(f'{{"value":{i}}}\n' for i in range(1, 5))
+    assert [c.kwargs["engine_url"] for c in connect_mock.call_args_list] == [
+        None,
+        "engine-name.url",
+        "engine-name.url",
+    ]
+    assert "Statement 4 done in" in result.stderr
+    for connection in connect_mock.connections[1:]:
+        connection.close.assert_called_once_with()
+
+
+def test_query_script_parallel_set(
+    configure_cli: Callable, configure_connections: Callable
+) -> None:
+    """
+    With --parallel, a SET statement runs after the statements before it,
+    and applies to all the statements after it, on every connection
+    """
+    configure_cli()
+    settings: Dict[int, List[str]] = {}
+    executed = []
+    column = mock.Mock()
+    column.name = "value"
+
+    def execute(cursor: mock.Mock, statement: str, parameters: Sequence) -> None:
+        cursor_settings = settings.setdefault(id(cursor), [])
+        if statement.upper().startswith("SET"):
+            cursor_settings.append(statement)
+            cursor.description = None
+            return
+
+        time.sleep(0.02)
+        executed.append((statement, list(cursor_settings)))
+        cursor.description = [column]
+        cursor.fetchmany.side_effect = [[[1]], []]
+
+    configure_connections(execute)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--engine-name", "engine-name", "--parallel", "3", "--format", "ndjson"],
+        input="SELECT 1; SELECT 2; SET a = 1; SELECT 3; SELECT 4; SELECT 5;",
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout == '{"value":1}\n' * 5
+    assert sorted(executed) == [
+        ("SELECT 1", []),
+        ("SELECT 2", []),
+        ("SELECT 3", ["SET a = 1"]),
+        ("SELECT 4", ["SET a = 1"]),
+        ("SELECT 5", ["SET a = 1"]),
+    ]
+    assert "Statement 3 done in" in result.stderr
+
+
+def test_query_script_dag(
+    configure_cli: Callable, configure_connections: Callable
+) -> None:
+    """
+    With --dag, a statement starts once the statements it depends on are done,
+    independent statements run at the same time
+    """
+    configure_cli()
+    events = []
+    column = mock.Mock()
+    column.name = "value"
+
+    def execute(cursor: mock.Mock, statement: str, parameters: Sequence) -> None:
+        number = statement.split()[-1]
+        events.append(f"start {number}")
+        time.sleep(0.1 if number == "1" else 0.01)
+        events.append(f"end {number}")
+        cursor.description = [column]
+        cursor.fetchmany.side_effect = [[[int(number)]], []]
+
+    configure_connections(execute)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--engine-name", "engine-name", "--dag", "--parallel", "2"],
+        input="INSERT INTO a SELECT 1;\n"
+        "SELECT * FROM b, 2;\n"
+        "INSERT INTO b SELECT * FROM a, 3;\n",
+        catch_exceptions=False,
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert events.index("start 2") < events.index("end 1")
+    assert events.index("start 3") > events.index("end 1")
+    assert events.index("start 3") > events.index("end 2")
+    assert [line for line in result.stdout.split("\n") if "| " in line][1::2] == [
+        "|       1 |",
+        "|       2 |",
+        "|       3 |",
+    ]
+    assert "Critical path: statements 1, 3 took" in result.stderr
+
+
+def test_query_script_dag_set(
+    configure_cli: Callable, configure_connections: Callable
+) -> None:
+    """
+    With --dag, the value of a SET statement reaches the later statements
+    on every connection
+    """
+    configure_cli()
+    settings: Dict[int, List[str]] = {}
+    executed = []
+
+    def execute(cursor: mock.Mock, statement: str, parameters: Sequence) -> None:
+        cursor_settings = settings.setdefault(id(cursor), [])
+        if statement.upper().startswith("SET"):
+            cursor_settings.append(statement)
+        else:
+            time.sleep(0.02)
+            executed.append((statement, list(cursor_settings)))
+        cursor.description = None
+
+    configure_connections(execute)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--engine-name", "engine-name", "--dag", "--parallel", "2"],
+        input="INSERT INTO a SELECT 1;\n"
+        "SET x = 1;\n"
+        "INSERT INTO b SELECT 2;\n"
+        "INSERT INTO c SELECT 3;\n",
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert sorted(executed) == [
+        ("INSERT INTO a SELECT 1", []),
+        ("INSERT INTO b SELECT 2", ["SET x = 1"]),
+        ("INSERT INTO c SELECT 3", ["SET x = 1"]),
+    ]
+
+
+def test_query_script_pipelined(
+    configure_cli: Callable, configure_connections: Callable
+) -> None:
+    """
+    With --pipeline, the next statement is executed on the second connection,
+    while the result of the current one is read, but not before it is executed
+    """
+    configure_cli()
+    events = []
+    column = mock.Mock()
+    column.name = "value"
+
+    def execute(cursor: mock.Mock, statement: str, parameters: Sequence) -> None:
+        number = statement.split()[-1]
+        events.append(f"execute {number}")
+
+        def fetchmany(*args) -> list:
+            time.sleep(0.05)
+            events.append(f"fetch {number}")
+            return []
+
+        cursor.description = [column]
+        cursor.fetchmany.side_effect = fetchmany
+
+    connect_mock = configure_connections(execute)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--engine-name", "engine-name", "--pipeline"],
+        input="SELECT 1; SELECT 2; SELECT 3;",
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert events == [
+        "execute 1",
+        "execute 2",
+        "fetch 1",
+        "execute 3",
+        "fetch 2",
+        "fetch 3",
+    ]
+    assert result.stderr.index("Statement 1 done") < result.stderr.index(
+        "Statement 2 done"
+    )
+    connect_mock.connections[1].close.assert_called_once_with()
+
+
+def test_query_script_pipelined_set(
+    configure_cli: Callable, configure_connections: Callable
+) -> None:
+    """
+    With --pipeline, the value of a SET statement reaches the following
+    statements on both connections
+    """
+    configure_cli()
+    settings: Dict[int, List[str]] = {}
+    executed = []
+    column = mock.Mock()
+    column.name = "value"
+
+    def execute(cursor: mock.Mock, statement: str, parameters: Sequence) -> None:
+        cursor_settings = settings.setdefault(id(cursor), [])
+        if statement.upper().startswith("SET"):
+            cursor_settings.append(statement)
+            cursor.description = None
+            return
+
+        executed.append((statement, list(cursor_settings)))
+        cursor.description = [column]
+        cursor.fetchmany.side_effect = [[[1]], []]
+
+    configure_connections(execute)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--engine-name", "engine-name", "--pipeline", "--format", "ndjson"],
+        input="SELECT 1; SET a = 1; SELECT 2; SELECT 3; SET b = 2; SELECT 4;",
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout == '{"value":1}\n' * 4
+    assert executed == [
+        ("SELECT 1", []),
+        ("SELECT 2", ["SET a = 1"]),
+        ("SELECT 3", ["SET a = 1"]),
+        ("SELECT 4", ["SET a = 1", "SET b = 2"]),
+    ]
+    assert "Statement 5 done in" in result.stderr
+
+
+def test_query_script_options(configure_cli: Callable) -> None:
+    configure_cli()
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--engine-name", "engine-name", "--pipeline", "--parallel", "2"],
+        input="SELECT 1;",
+    )
+    assert result.exit_code != 0
+    assert "--pipeline cannot be combined" in result.stderr
+
+    # the script is either piped or read from --file
+    with open("script.sql", "w") as file:
+        file.write("SELECT 1;")
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--engine-name", "engine-name", "--file", "script.sql", "--parallel", "2"],
+        input="SELECT 2;",
+    )
+    assert result.exit_code == os.EX_USAGE
+    assert "both are specified" in result.stderr
+
+
+def test_query_script_async(
+    mocker: MockerFixture, configure_cli: Callable, configure_connections: Callable
+) -> None:
+    """
+    With --async-connections, the statements are executed with the async client
+    on the resolved url of the engine
+    """
+    configure_cli()
+    executed = []
+    configure_connections(lambda cursor, statement, parameters: executed.append(1))
+
+    async_connections = []
+
+    async def async_connect(**kwargs) -> mock.Mock:
+        assert kwargs["engine_url"] == "engine-name.url"
+
+        connection = mock.Mock()
+        connection.aclose = mock.AsyncMock()
+        async_cursor = connection.cursor.return_value
+        column = mock.Mock()
+        column.name = "value"
+        async_cursor.description = [column]
+        async_cursor.execute = mock.AsyncMock()
+        async_cursor.fetchmany = mock.AsyncMock(side_effect=[[[1]], []])
+        async_cursor.nextset = mock.AsyncMock(return_value=None)
+        async_connections.append(connection)
+        return connection
+
+    mocker.patch("firebolt_cli.query.async_connect", side_effect=async_connect)
+    runner_mock = mocker.patch(
+        "firebolt_cli.query.AsyncStatementRunner", wraps=AsyncStatementRunner
+    )
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        [
+            "--engine-name",
+            "engine-name",
+            "--async-connections",
+            "2",
+            "--statement-timeout",
+            "10",
+            "--format",
+            "ndjson",
+        ],
+        input="SELECT 1;",
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout == '{"value":1}\n'
+    assert len(async_connections) == 2
+    # a statement in flight for each connection, though --parallel is not set
+    assert runner_mock.call_args.args[1:] == (2, 2)
+    assert runner_mock.call_args.kwargs["timeout"] == 10.0
+    async_connections[0].cursor.return_value.execute.assert_awaited_once_with(
+        "SELECT 1"
+    )
+    # the sync connection only resolves the url of the engine
+    assert executed == []
+
+
+def test_query_params(
+    fs: FakeFilesystem, configure_cli: Callable, configure_connections: Callable
+) -> None:
+    """
+    With --params, the query runs once for each row of the parameters,
+    the rows of the results follow the parameters they were returned for
+    """
+    configure_cli()
+    fs.create_file("params.csv", contents="id:int,name\n1,a\n2,b\n3,c\n")
+    column = mock.Mock()
+    column.name = "value"
+
+    def execute(cursor: mock.Mock, statement: str, parameters: Sequence) -> None:
+        time.sleep(0.01 * (3 - parameters[0]))
+        cursor.description = [column]
+        cursor.fetchmany.side_effect = [[[parameters[1] * 2]], []]
+
+    configure_connections(execute)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        [
+            "--engine-name",
+            "engine-name",
+            "--params",
+            "params.csv",
+            "--parallel",
+            "2",
+            "--format",
+            "csv",
+        ],
+        input="SELECT ? || ?",
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout == "id,name,value\n1,a,aa\n2,b,bb\n3,c,cc\n"
+    assert "3 parameters rows done" in result.stderr
+
+
+def test_query_script_several_engines(
+    mocker: MockerFixture, configure_cli: Callable, configure_connections: Callable
+) -> None:
+    """
+    The statements are spread over the running engines of --engine-name
+    """
+    configure_cli()
+
+    rm = mocker.patch("firebolt_cli.query.construct_resource_manager").return_value
+    rm.engines.get_by_name.side_effect = lambda name: mock.Mock(
+        current_status_summary=EngineStatusSummary.ENGINE_STATUS_SUMMARY_STOPPED
+        if name == "ro2"
+        else EngineStatusSummary.ENGINE_STATUS_SUMMARY_RUNNING
+    )
+
+    executed = {}
+
+    def execute(cursor: mock.Mock, statement: str, parameters: Sequence) -> None:
+        time.sleep(0.05)
+        executed.setdefault(cursor.connection.engine_url, []).append(statement)
+
+    connect_mock = configure_connections(execute)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query,
+        ["--engine-name", "ro1,ro2,ro3", "--parallel", "2"],
+        input="SELECT 1; SELECT 2; SELECT 3; SELECT 4;",
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert "Engine ro2 is skipped" in result.stderr
+    assert [c.kwargs["engine_name"] for c in connect_mock.call_args_list] == [
+        "ro1",
+        "ro3",
+    ]
+    assert set(executed) == {"ro1.url", "ro3.url"}
+    assert sum(len(statements) for statements in executed.values()) == 4
+
+    result = CliRunner(mix_stderr=False).invoke(
+        query, ["--engine-name", "ro1,ro3"], input="SELECT 1;"
+    )
+    assert result.exit_code != 0
+    assert "Several engines could be used only with" in result.stderr
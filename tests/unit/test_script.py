@@ -0,0 +1,84 @@
+import io
+
+import pytest
+from firebolt.common.exception import FireboltError
+
+from firebolt_cli.script import ScriptReader, StatementSplitter
+
+SCRIPT = """-- create the table; it is new
+CREATE TABLE t (id INT, "weird;name" TEXT);
+INSERT INTO t VALUES (1, 'it''s; quoted'), (2, '/* not a comment; */');
+/* a comment;
+   over lines */
+SELECT * FROM t WHERE "weird;name" = '--;'  ;
+;  -- nothing here;
+SELECT 2 - 1 /* end */"""
+
+STATEMENTS = [
+    '-- create the table; it is new\nCREATE TABLE t (id INT, "weird;name" TEXT)',
+    "INSERT INTO t VALUES (1, 'it''s; quoted'), (2, '/* not a comment; */')",
+    "/* a comment;\n   over lines */\nSELECT * FROM t WHERE \"weird;name\" = '--;'",
+    "-- nothing here;\nSELECT 2 - 1 /* end */",
+]
+
+
+def split(text: str, chunk_size: int) -> list:
+    splitter = StatementSplitter()
+    statements = []
+    for start in range(0, len(text), chunk_size):
+        statements.extend(splitter.feed(text[start : start + chunk_size]))
+
+    last = splitter.finish()
+    return statements + ([last] if last is not None else [])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+def test_statement_splitter(chunk_size: int) -> None:
+    """
+    Semicolons in strings, identifiers and comments don't split statements,
+    no matter how the text is split into chunks
+    """
+    assert split(SCRIPT, chunk_size) == STATEMENTS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 1000])
+def test_statement_splitter_escapes(chunk_size: int) -> None:
+    """
+    Quotes escaped with a backslash don't end strings and identifiers,
+    an escaped backslash doesn't escape the quote after it
+    """
+    text = "SELECT 'a\\';b', \"c\\\";d\";SELECT 'e\\\\';SELECT 'f\\\\\\''';'"
+    assert split(text, chunk_size) == [
+        "SELECT 'a\\';b', \"c\\\";d\"",
+        "SELECT 'e\\\\'",
+        "SELECT 'f\\\\\\''';'",
+    ]
+
+
+def test_statement_splitter_unterminated_comment() -> None:
+    with pytest.raises(FireboltError, match="ends inside of a"):
+        split("SELECT 1; /* SELECT 2;", 1000)
+
+
+def test_statement_splitter_comments_only() -> None:
+    assert split("SELECT 1; -- the end\n/* really */", 1000) == ["SELECT 1"]
+    assert split("", 1000) == []
+    assert split("SELECT 1 -", 1000) == ["SELECT 1 -"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 10])
+def test_script_reader(chunk_size: int) -> None:
+    """
+    Multi-byte characters split between chunks are decoded,
+    the progress is measured in bytes
+    """
+    data = "SELECT 'ünïcode';\nSELECT 2;".encode("utf-8")
+    script = ScriptReader(io.BytesIO(data), len(data), chunk_size=chunk_size)
+
+    statements = iter(script)
+    assert next(statements) == "SELECT 'ünïcode'"
+    assert script.progress is not None and script.progress < 1
+    assert list(statements) == ["SELECT 2"]
+    assert script.progress == 1.0
+
+    assert ScriptReader(io.BytesIO(data)).progress is None
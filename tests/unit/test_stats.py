@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from firebolt_cli.stats import HyperLogLog, ResultStats
+
+
+def test_hyperloglog() -> None:
+    """
+    The estimate is exact for small cardinalities, and close for large ones
+    """
+    hll = HyperLogLog()
+    for value in ["a", "b", "a", 1, 1]:
+        hll.add(value)
+    assert hll.estimate() == 3
+
+    hll = HyperLogLog()
+    for i in range(100000):
+        hll.add(i % 50000)
+    assert abs(hll.estimate() - 50000) < 50000 * 0.05
+
+
+def test_result_stats() -> None:
+    stats = ResultStats(["id", "name", "price"])
+    stats.update([[1, "b", Decimal("1.5")], [2, None, None]])
+    stats.update([])
+    stats.update([[3, "a", Decimal("2.5")], [3, "c", 2]])
+
+    assert stats.row_count == 4
+    assert stats.rows() == [
+        ["id", 4, 0, 1, 3, 3, 2.25],
+        ["name", 4, 1, "a", "c", 3, None],
+        ["price", 4, 1, Decimal("1.5"), Decimal("2.5"), 3, 2.0],
+    ]
+
+
+def test_result_stats_mixed_types() -> None:
+    """
+    Values, which cannot be compared, don't break the statistics
+    """
+    stats = ResultStats(["value"])
+    stats.update([[1], ["a"], [2]])
+
+    assert stats.rows() == [["value", 3, 0, 1, 2, 3, None]]
@@ -7,14 +7,27 @@ from appdirs import user_config_dir
 from firebolt.common import Settings
 from firebolt.common.exception import FireboltError
 from firebolt.service.manager import ResourceManager
-from httpx import HTTPStatusError
+from httpx import ConnectError, HTTPStatusError
 from pyfakefs.fake_filesystem import FakeFilesystem
 from pytest_mock import MockerFixture
+from tabulate import tabulate
 
 from firebolt_cli.utils import (
+    INITIAL_BATCH_SIZE,
+    MIN_BATCH_SIZE,
+    BalancedConnectionPool,
+    BatchSizer,
+    ConnectionPool,
+    PageFetcher,
+    ResultChecksum,
+    SpillBuffer,
     construct_resource_manager,
     convert_bytes,
+    estimate_batch_size,
+    estimate_size,
+    fetch_batches,
     get_default_database_engine,
+    parse_bytes,
     prepare_execution_result_line,
     prepare_execution_result_table,
     read_config,
@@ -59,6 +72,35 @@ def test_prepare_execution_multiple() -> None:
     )
 
 
+def test_prepare_execution_tabulate_layout() -> None:
+    """
+    The in-memory tables of the list commands and query diff keep the layout
+    of tabulate, e.g. numeric text and decimal points are aligned
+    """
+    data = [["1", 0.1 + 0.2, "  indented", "two\nlines"], ["200", 10.25, "x", None]]
+    headers = ["id", "value", "text", "note"]
+
+    table = prepare_execution_result_table(data, headers)
+    assert table == tabulate(data, headers=headers, tablefmt="grid")
+    assert table.splitlines()[3:5] == [
+        "|    1 |    0.3  | indented | two    |",
+        "|      |         |          | lines  |",
+    ]
+    assert table.splitlines()[6] == "|  200 |   10.25 | x        |        |"
+
+
+def test_prepare_execution_compact() -> None:
+    data = [[0, "a"], [1, ["b"]]]
+    headers = ["name0", "name1"]
+
+    assert prepare_execution_result_table(
+        data, headers, use_json=True, compact=True
+    ) == json.dumps([dict(zip(headers, d)) for d in data], separators=(",", ":"))
+    assert prepare_execution_result_line(
+        data[1], headers, use_json=True, compact=True
+    ) == json.dumps(dict(zip(headers, data[1])), separators=(",", ":"))
+
+
 def test_prepare_execution_wrong_header() -> None:
     data = [[0, 1, 2, 3], [4, 5, 6, 7]]
     headers = ["name0", "name1", "name2", "name3"]
@@ -78,6 +120,233 @@ def test_prepare_execution_wrong_header() -> None:
         prepare_execution_result_line(data, wrong_headers, use_json=False)
 
 
+def test_fetch_batches(mocker: MockerFixture) -> None:
+    cursor = mocker.Mock()
+    cursor.fetchmany.side_effect = [[[1], [2]], [[3], [4]], []]
+    assert list(fetch_batches(cursor, batch_size=2)) == [[[1], [2]], [[3], [4]]]
+    assert cursor.fetchmany.call_count == 3
+
+    # a short batch means the end of the result, no extra fetch is needed
+    cursor.fetchmany.reset_mock()
+    cursor.fetchmany.side_effect = [[[1], [2]], [[3]]]
+    assert list(fetch_batches(cursor, batch_size=2)) == [[[1], [2]], [[3]]]
+    assert cursor.fetchmany.call_count == 2
+
+
+def test_batch_sizer() -> None:
+    """
+    The batch size follows the measured row size, within the batch size limits
+    """
+    sizer = BatchSizer(memory_budget=estimate_size([1, "a"]) * 1000)
+    assert sizer.batch_size == INITIAL_BATCH_SIZE
+    assert sizer.update([[1, "a"]] * 100) == 1000
+
+    sizer = BatchSizer(memory_budget=estimate_size(["a" * 1000]) * 10)
+    assert sizer.update([["a" * 1000]] * 100) == 10
+
+    assert BatchSizer(memory_budget=1).update([["a" * 1000]]) == MIN_BATCH_SIZE
+    assert BatchSizer(memory_budget=10 ** 9, max_batch_size=500).update([[1]]) == 500
+
+
+def test_fetch_batches_memory_budget(mocker: MockerFixture) -> None:
+    cursor = mocker.Mock()
+    row = [1, "a"]
+    cursor.fetchmany.side_effect = [
+        [row] * INITIAL_BATCH_SIZE,
+        [row] * 1000,
+        [row] * 10,
+    ]
+
+    batches = list(fetch_batches(cursor, memory_budget=estimate_size(row) * 1000))
+    assert [len(batch) for batch in batches] == [INITIAL_BATCH_SIZE, 1000, 10]
+    assert [c.args[0] for c in cursor.fetchmany.call_args_list] == [
+        INITIAL_BATCH_SIZE,
+        1000,
+        1000,
+    ]
+
+
+@pytest.mark.parametrize("memory_limit", [10 ** 9, 0])
+def test_spill_buffer(memory_limit: int) -> None:
+    """
+    The rows are read back the same, either from memory or from the spill file
+    """
+    batches = [[[i, f"row{i}"] for i in range(start, start + 3)] for start in (0, 3, 6)]
+
+    with SpillBuffer(memory_limit) as buffer:
+        buffer.extend(batches + [[]])
+        assert buffer.spilled == (memory_limit == 0)
+        assert buffer.row_count == 9
+
+        assert list(buffer.batches()) == batches
+        # the batches can be read more than once
+        assert list(buffer.batches()) == batches
+
+
+def test_spill_buffer_threshold() -> None:
+    """
+    Batches are kept in memory until their size passes the threshold
+    """
+    batch = [["a" * 100]] * 10
+    buffer = SpillBuffer(estimate_batch_size(batch) * 2)
+
+    buffer.append(batch)
+    buffer.append(batch)
+    assert not buffer.spilled
+    buffer.append(batch)
+    assert buffer.spilled
+    assert list(buffer.batches()) == [batch] * 3
+
+    buffer.close()
+    assert buffer.row_count == 0
+
+
+def test_page_fetcher(mocker: MockerFixture) -> None:
+    """
+    The next page is fetched in background, before it is requested
+    """
+    cursor = mocker.Mock()
+    cursor.fetchmany.side_effect = [[[1], [2]], [[3], [4]], []]
+
+    with PageFetcher(cursor, page_size=2) as pages:
+        assert pages.next_page() == [[1], [2]]
+        assert not pages.exhausted
+        assert pages.next_page() == [[3], [4]]
+        assert pages.next_page() == []
+        assert pages.exhausted
+        assert pages.row_count == 4
+
+        assert pages.next_page() == []
+        assert cursor.fetchmany.call_count == 3
+
+    # a short page means the end of the result, no extra fetch is needed
+    cursor.fetchmany.reset_mock()
+    cursor.fetchmany.side_effect = [[[1], [2]], [[3]]]
+    with PageFetcher(cursor, page_size=2) as pages:
+        assert pages.next_page() == [[1], [2]]
+        assert pages.next_page() == [[3]]
+        assert pages.exhausted
+    assert cursor.fetchmany.call_count == 2
+
+
+def test_connection_pool(mocker: MockerFixture) -> None:
+    """
+    The provided connection is used first, new connections are opened only
+    if all the others are busy, and only the opened ones are closed
+    """
+    first = mocker.Mock()
+    opened = [mocker.Mock(), mocker.Mock()]
+    connect = mocker.Mock(side_effect=opened)
+
+    with ConnectionPool(connect, size=3, connection=first) as pool:
+        with pool.connection() as connection:
+            assert connection is first
+        with pool.connection() as connection:
+            assert connection is first
+            with pool.connection() as other:
+                assert other is opened[0]
+        assert connect.call_count == 1
+
+        connect.side_effect = FireboltError("no connection")
+        assert {pool.acquire(), pool.acquire()} == {first, opened[0]}
+        with pytest.raises(FireboltError):
+            pool.acquire()
+
+    first.close.assert_not_called()
+    opened[0].close.assert_called_once_with()
+
+
+def test_connection_pool_settings(mocker: MockerFixture) -> None:
+    """
+    Each connection keeps a single cursor, the settings applied to the pool
+    are run on every cursor before it is used next, an invalid one is dropped
+    """
+    connections = [mocker.Mock(), mocker.Mock()]
+    pool = ConnectionPool(mocker.Mock(side_effect=connections), size=2)
+
+    first = pool.acquire_cursor()
+    with pool.cursor() as second:
+        assert second is not first
+    pool.release_cursor(first)
+
+    pool.apply_setting("SET a = 1")
+    with pool.cursor() as cursor:
+        with pool.cursor() as other:
+            assert {cursor, other} == {first, second}
+    for cursor in (first, second):
+        cursor.execute.assert_called_once_with("SET a = 1")
+
+    first.execute.side_effect = FireboltError("invalid setting")
+    second.execute.side_effect = FireboltError("invalid setting")
+    with pytest.raises(FireboltError):
+        pool.apply_setting("SET b = 1")
+    assert pool.settings == ["SET a = 1"]
+
+    pool.close()
+    first.close.assert_called_once_with()
+    second.close.assert_called_once_with()
+    for connection in connections:
+        connection.cursor.assert_called_once_with()
+        connection.close.assert_called_once_with()
+
+
+def test_balanced_connection_pool(mocker: MockerFixture) -> None:
+    """
+    A connection is taken from the engine with the least connections in use,
+    an engine, which fails to connect, is skipped
+    """
+    connect = {
+        "ro1": mocker.Mock(side_effect=lambda: mocker.Mock(engine="ro1")),
+        "ro2": mocker.Mock(side_effect=FireboltError("stopped")),
+        "ro3": mocker.Mock(side_effect=lambda: mocker.Mock(engine="ro3")),
+        "ro4": mocker.Mock(side_effect=ConnectError("unreachable")),
+    }
+    engines = [(name, ConnectionPool(connect[name], 3)) for name in connect]
+    pool = BalancedConnectionPool(engines, 3)
+
+    first, second = pool.acquire(), pool.acquire()
+    assert (first.engine, second.engine) == ("ro1", "ro3")
+    connect["ro2"].assert_called_once_with()
+    assert pool.acquire().engine == "ro1"
+    connect["ro4"].assert_called_once_with()
+
+    pool.release(second)
+    assert pool.acquire() is second
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.close()
+    first.close.assert_called_once_with()
+
+    for name in connect:
+        connect[name].side_effect = FireboltError("stopped")
+    with pytest.raises(FireboltError, match="None of the engines"):
+        BalancedConnectionPool(engines, 3).acquire()
+
+
+def test_result_checksum() -> None:
+    """
+    The unordered checksum doesn't depend on the order of the rows,
+    the ordered one does, and neither depends on the batches
+    """
+    rows = [[1, "a", None], [2, "b", 1.5], [2, "b", 1.5], [3, None, [1, 2]]]
+
+    def checksum(batches, ordered: bool) -> str:
+        result = ResultChecksum(ordered)
+        for batch in batches:
+            result.update(batch)
+        return result.hexdigest()
+
+    for ordered in [False, True]:
+        assert checksum([rows], ordered) == checksum([rows[:1], rows[1:]], ordered)
+        assert checksum([rows], ordered) != checksum([rows[:3]], ordered)
+
+    assert checksum([rows], False) == checksum([rows[::-1]], False)
+    assert checksum([rows], True) != checksum([rows[::-1]], True)
+    # duplicates are not cancelled out
+    assert checksum([rows[1:3]], False) != checksum([[]], False)
+    assert len(checksum([[]], False)) == len(checksum([[]], True)) == 32
+
+
 def test_convert_bytes() -> None:
     assert "" == convert_bytes(None)
 
@@ -93,6 +362,20 @@ def test_convert_bytes() -> None:
     assert "19.99 EB" == convert_bytes(19.99 * 2 ** 60)
 
 
+def test_parse_bytes() -> None:
+    assert parse_bytes("512") == 512
+    assert parse_bytes("512B") == 512
+    assert parse_bytes("64KB") == 64 * 2 ** 10
+    assert parse_bytes("256mb") == 256 * 2 ** 20
+    assert parse_bytes("1.5 GB") == int(1.5 * 2 ** 30)
+
+    with pytest.raises(ValueError):
+        parse_bytes("-1MB")
+
+    with pytest.raises(ValueError):
+        parse_bytes("many")
+
+
 ALL_CONFIG_PARAMS = [
     "username",
     "account_name",